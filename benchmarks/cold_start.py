@@ -0,0 +1,45 @@
+"""
+Guard and benchmark for the cold start of a client that only needs json.
+
+Imports fred and builds Fred(response_type='json') in fresh interpreters,
+fails if pandas, numpy or asyncio were loaded on the way, and reports the
+median import and construction time.
+
+    python benchmarks/cold_start.py [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+
+## Modules a json-only client must not import
+_FORBIDDEN = ['pandas', 'numpy', 'asyncio']
+
+_PROBE = '''
+import json, sys, time
+started = time.time()
+import fred
+fr = fred.Fred(api_key='abcdefghijklmnopqrstuvwxyz123456', response_type='json', cache=False)
+seconds = time.time() - started
+print(json.dumps({'seconds': seconds, 'loaded': [name for name in %r if name in sys.modules]}))
+''' % (_FORBIDDEN,)
+
+def probe():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.check_output([sys.executable, '-c', _PROBE], env=env)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+def main(runs=5):
+    results = [probe() for _ in range(runs)]
+    loaded = sorted(set(name for result in results for name in result['loaded']))
+    seconds = sorted(result['seconds'] for result in results)[len(results) // 2]
+    print('import fred + Fred(response_type=json): %.1f ms (median of %d)' % (seconds * 1000, runs))
+    if loaded:
+        print('FAIL: json cold start imported %s' % ', '.join(loaded))
+        return 1
+    print('OK: no %s imported' % ', '.join(_FORBIDDEN))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
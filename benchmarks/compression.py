@@ -0,0 +1,111 @@
+"""
+Benchmark of compressed transfers against a local mock FRED server.
+
+Serves synthetic series.observations and release.series responses from a
+server on 127.0.0.1 that gzips bodies when asked to and counts the bytes it
+sends. The same workload is then run with compression on and off, and the
+bytes on the wire and the wall time of each are reported.
+
+    python benchmarks/compression.py [observations] [repeats]
+"""
+from io import BytesIO
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if sys.version_info[0] >= 3:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl
+else:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+
+from fred import Fred
+from fred.transport import Transport
+
+## Size of the synthetic responses
+OBSERVATIONS = 20000
+RELEASE_SERIES = 2500
+
+def _observations(count):
+    rows = [{'realtime_start': '2020-01-01','realtime_end': '2020-01-01',
+             'date': '%d-%02d-01' % (1900 + i // 12, i % 12 + 1),'value': '%.3f' % (i * 1.7)} for i in range(count)]
+    return {'count': count,'offset': 0,'limit': 100000,'observations': rows}
+
+def _release_series(offset, limit):
+    rows = [{'id': 'SERIES%d' % i,'realtime_start': '2020-01-01','realtime_end': '2020-01-01',
+             'title': 'Synthetic series %d' % i,'frequency': 'Monthly','units': 'Index',
+             'seasonal_adjustment': 'Seasonally Adjusted','last_updated': '2020-01-01 08:00:00-05',
+             'popularity': '3'} for i in range(offset, min(RELEASE_SERIES, offset + limit))]
+    return {'count': RELEASE_SERIES,'offset': offset,'limit': limit,'seriess': rows}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    sent = [0]
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        if parts.path.endswith('/series/observations'):
+            body = _observations(OBSERVATIONS)
+        else:
+            body = _release_series(int(query.get('offset', 0)), int(query.get('limit', 1000)))
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            buffer = BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6) as f:
+                f.write(data)
+            data = buffer.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.lock:
+            self.sent[0] += len(data)
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def run(root, compress, repeats):
+    fr = Fred(api_key='abcdefghijklmnopqrstuvwxyz123456', response_type='raw', cache=False, rate_limiter=False)
+    fr.transport = Transport(compress=compress)
+    for client in (fr.series, fr.release):
+        client.url_root = root
+    _Handler.sent[0] = 0
+    started = time.time()
+    for _ in range(repeats):
+        fr.series.observations('SYNTH')
+    pages = sum(1 for _ in fr.release.series(51, paginate=True, params={'limit': 1000}))
+    seconds = time.time() - started
+    return _Handler.sent[0], seconds, repeats + pages
+
+def main(observations=OBSERVATIONS, repeats=5):
+    global OBSERVATIONS
+    OBSERVATIONS = observations
+    server = _Server(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever).start()
+    try:
+        root = 'http://127.0.0.1:%d/fred' % server.server_address[1]
+        for compress in (False, True):
+            sent, seconds, requests = run(root, compress, repeats)
+            print('compress=%-5s requests=%d wire bytes=%d (%.2f MB) wall=%.2f s'
+                  % (compress, requests, sent, sent / 1e6, seconds))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -3,7 +3,13 @@ from fred.clients.releases import ReleasesClient
 from fred.clients.tags import TagsClient
 from fred.clients.sources import SourcesClient
 from fred.clients.eseries import ESeriesClient
+from fred.transport import Transport
+from fred.cache import _response_cache
+from fred.limiter import _rate_limiter
+from fred.retry import _retry_policy
+from fred.metrics import _instruments
 import fred.config as c
+from sys import version_info
 import weakref
 
 ## Establish Federal Reserve Economic Data (Fred) wrapper for Python
@@ -24,8 +30,35 @@ class Fred(object):
     :arg str realtime_start: The start of the real-time period. Format "YYYY-MM-DD"
     :arg str realtime_end: The end of the real-time period. Format "YYYY-MM-DD"
     :arg bool ssl_verify: To verify HTTPs.
+    :arg int pool_size: Maximum number of idle keep-alive connections kept per host.
+    :arg float idle_timeout: Seconds an idle connection is kept before it is discarded.
+    :arg float calls_per_second: Requests per second allowed by the rate limit.
+    :arg rate_limiter: Client-side rate limit. True shares it with the other clients of this
+                       process, a path shares it with other processes through that file, and a
+                       :class:`fred.limiter.RateLimiter` instance (e.g. a
+                       :class:`fred.limiter.RedisLimiter`) is used as is. False disables it.
+    :arg retry: Retry failed requests with exponential backoff. True, False, a number of
+                retries, or a :class:`fred.retry.RetryPolicy` instance.
+    :arg cache: Cache raw responses. True, False, or a :class:`fred.cache.ResponseCache` instance.
+    :arg str cache_location: Directory of the response cache. None keeps the cache in memory.
+    :arg int cache_size: Size budget of the response cache in bytes.
+    :arg dict cache_ttls: Seconds a cached response stays fresh, by endpoint path prefix.
+    :arg bool cache_revalidate: Before downloading expired series observations again, check
+                                whether the series changed since they were cached.
+    :arg store: Read-through store for series observations. A directory, or a
+                :class:`fred.store.ObservationStore` instance. Requires pandas.
+    :arg str file_type: File type requested from FRED for the structured response types,
+                        'json' or 'xml'. With 'xml' they are decoded from the same responses
+                        as response_type 'xml', so either can be served from the other's cache.
+    :arg instruments: Record request counters, stage timings and hooks. True, False, or a
+                      :class:`fred.metrics.Instruments` instance, available as ``instruments``.
     """
-    def __init__(self,api_key=c.api_key,response_type=c.response_type, ssl_verify=c.ssl_verify):
+    def __init__(self,api_key=c.api_key,response_type=c.response_type, ssl_verify=c.ssl_verify,
+                 pool_size=c.pool_size,idle_timeout=c.idle_timeout,
+                 calls_per_second=c.calls_per_second,rate_limiter=c.rate_limiter,retry=c.retry,
+                 cache=c.cache,cache_location=c.cache_location,cache_size=c.cache_size,cache_ttls=None,
+                 cache_revalidate=c.cache_revalidate,store=c.store,file_type=c.file_type,
+                 instruments=c.instruments):
         ## Set root URL
         self.url_root = 'https://api.stlouisfed.org/fred'
         ## Set default API key
@@ -34,9 +67,34 @@ class Fred(object):
         self.response_type = response_type if response_type else None
         ## Set SSL Verify
         self.ssl_verify = ssl_verify
+        ## Set file type requested for structured responses
+        self.file_type = file_type
+        ## Set keep-alive transport shared by all clients
+        self.transport = Transport(pool_size=pool_size,idle_timeout=idle_timeout,
+                                   limiter=_rate_limiter(rate_limiter,calls_per_second),
+                                   retry=_retry_policy(retry),
+                                   cache=_response_cache(cache,cache_location,cache_size,cache_ttls,cache_revalidate),
+                                   instruments=_instruments(instruments))
+        self.instruments = self.transport.instruments
+        ## Set observation store
+        self.store = None
+        if store:
+            from fred.store import _observation_store
+            self.store = _observation_store(store)
         ## Initiate clients
         self.category = CategoriesClient(weakref.proxy(self),self.api_key,self.url_root,self.response_type,self.ssl_verify)
         self.release = ReleasesClient(weakref.proxy(self),self.api_key,self.url_root,self.response_type,self.ssl_verify)
         self.series = ESeriesClient(weakref.proxy(self),self.api_key,self.url_root,self.response_type,self.ssl_verify)
         self.tag = TagsClient(weakref.proxy(self),self.api_key,self.url_root,self.response_type,self.ssl_verify)
         self.source = SourcesClient(weakref.proxy(self),self.api_key,self.url_root,self.response_type,self.ssl_verify)
+
+## Asynchronous client (Python 3.5+), imported on first use on Python 3.7+
+## so that import fred does not load asyncio
+if version_info >= (3, 7):
+    def __getattr__(name):
+        if name == 'AsyncFred':
+            from fred.aio import AsyncFred
+            return AsyncFred
+        raise AttributeError("module 'fred' has no attribute %r" % name)
+elif version_info >= (3, 5):
+    from fred.aio import AsyncFred
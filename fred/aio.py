@@ -0,0 +1,215 @@
+from fred.clients.categories import CategoriesClient
+from fred.clients.releases import ReleasesClient
+from fred.clients.tags import TagsClient
+from fred.clients.sources import SourcesClient
+from fred.clients.eseries import ESeriesClient
+from fred.transport import Transport
+from fred.cache import _response_cache
+from fred.limiter import _rate_limiter
+from fred.retry import _retry_policy
+from fred.metrics import _instruments
+from fred.helpers import _observations_frame
+import fred.config as c
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+import asyncio
+import weakref
+
+class AsyncNamespacedClient(object):
+    """
+    Coroutine mirror of a :class:`fred.utils.NamespacedClient`. Every endpoint
+    method of the wrapped client is exposed under the same name and signature,
+    and returns the same response once awaited.
+    """
+    def __init__(self,client,namespace):
+        self.client = client
+        self.namespace = namespace
+
+class AsyncPages(object):
+    """
+    Asynchronous iterator over the pages of a paginated request, returned
+    by the coroutine methods of :class:`AsyncFred` called with
+    ``paginate=True``. Each page is fetched on the client's worker pool
+    within its concurrency limit.
+
+    ::
+
+        async for page in await fr.release.series(51,paginate=True,params={'limit':1000}):
+            process(page)
+    """
+    def __init__(self,client,pages):
+        self.client = client
+        self.pages = pages
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        page = await self.client._run(next,self.pages,StopAsyncIteration)
+        if page is StopAsyncIteration:
+            raise StopAsyncIteration
+        return page
+
+    def close(self):
+        """
+        Stop the pagination before its last page.
+        """
+        self.pages.close()
+
+def _coroutine(name,method):
+    @wraps(method)
+    async def _wrapped(self,*args,**kwargs):
+        result = await self.client._run(getattr(self.namespace,name),*args,**kwargs)
+        if kwargs.get('paginate'):
+            return AsyncPages(self.client,result)
+        return result
+    return _wrapped
+
+def _async_client(cls):
+    """
+    Build the coroutine mirror of a namespaced client class.
+    """
+    attrs = {'__doc__': cls.__doc__}
+    for name, method in vars(cls).items():
+        ## Only single-request endpoints (wrapped by query_params) are mirrored;
+        ## methods that issue several requests need their own coroutine version
+        if not name.startswith('_') and hasattr(method,'__wrapped__'):
+            attrs[name] = _coroutine(name,method)
+    return type('Async%s' % cls.__name__,(AsyncNamespacedClient,),attrs)
+
+class AsyncCategoriesClient(_async_client(CategoriesClient)):
+    """
+    Class for working with FRED categories
+    """
+    async def walk(self,root=0,max_workers=None,snapshot=None):
+        """
+        Coroutine mirror of :meth:`fred.clients.categories.CategoriesClient.walk`.
+        """
+        return await self.client._run(self.namespace.walk,root,max_workers,snapshot)
+
+AsyncReleasesClient = _async_client(ReleasesClient)
+
+class AsyncESeriesClient(_async_client(ESeriesClient)):
+    """
+    Class for working with FRED series
+    """
+    async def observations_many(self,series_ids=None,max_workers=None,params=None,**kwargs):
+        """
+        Coroutine mirror of :meth:`fred.clients.eseries.ESeriesClient.observations_many`.
+        Requests are bounded by the client's concurrency and rate limits, so
+        max_workers is accepted for compatibility and ignored.
+        """
+        series_ids = list(series_ids)
+        params = dict(params if params else {},**kwargs)
+        contents = await asyncio.gather(*[self.observations(series_id,response_type='raw',params=dict(params))
+                                          for series_id in series_ids])
+        return _observations_frame(series_ids,contents)
+
+AsyncTagsClient = _async_client(TagsClient)
+AsyncSourcesClient = _async_client(SourcesClient)
+
+class AsyncFred(object):
+    """
+    Asynchronous Fred client. Provides the same ``category``, ``release``,
+    ``series``, ``tag`` and ``source`` namespaces as :class:`fred.Fred`,
+    but every method is a coroutine:
+
+    ::
+
+        async with AsyncFred(api_key='abcdefghijklmnopqrstuvwxyz123456',response_type='df') as fr:
+            frames = await asyncio.gather(*[fr.series.observations(s) for s in series_ids])
+
+    Requests run on a bounded pool of worker threads over a shared keep-alive
+    transport. With ``paginate=True`` a method returns an :class:`AsyncPages`
+    to iterate with ``async for``. A semaphore caps the number of requests in flight, and the
+    rate limit is applied in the worker threads to every request, including
+    those a method issues internally, so the event loop never blocks on it.
+
+    :arg str api_key: 32 character alpha-numeric lowercase string. Required.
+    :arg str response_type: File extension of response.
+    :arg bool ssl_verify: To verify HTTPs.
+    :arg int max_concurrency: Maximum number of requests in flight at once.
+    :arg float calls_per_second: Requests per second allowed by the rate limit.
+    :arg rate_limiter: Client-side rate limit, as for :class:`fred.Fred`.
+    :arg retry: Retry policy for failed requests, as for :class:`fred.Fred`.
+    :arg int pool_size: Maximum number of idle keep-alive connections kept per host.
+                        Defaults to max_concurrency.
+    :arg float idle_timeout: Seconds an idle connection is kept before it is discarded.
+    :arg cache: Cache raw responses. True, False, or a :class:`fred.cache.ResponseCache` instance.
+    :arg str cache_location: Directory of the response cache. None keeps the cache in memory.
+    :arg int cache_size: Size budget of the response cache in bytes.
+    :arg dict cache_ttls: Seconds a cached response stays fresh, by endpoint path prefix.
+    :arg bool cache_revalidate: Before downloading expired series observations again, check
+                                whether the series changed since they were cached.
+    :arg store: Read-through store for series observations. A directory, or a
+                :class:`fred.store.ObservationStore` instance. Requires pandas.
+    :arg str file_type: File type requested from FRED for the structured response types,
+                        'json' or 'xml'. With 'xml' they are decoded from the same responses
+                        as response_type 'xml', so either can be served from the other's cache.
+    :arg instruments: Record request counters, stage timings and hooks. True, False, or a
+                      :class:`fred.metrics.Instruments` instance, available as ``instruments``.
+    """
+    def __init__(self,api_key=c.api_key,response_type=c.response_type,ssl_verify=c.ssl_verify,
+                 max_concurrency=c.max_concurrency,calls_per_second=c.calls_per_second,
+                 rate_limiter=c.rate_limiter,retry=c.retry,pool_size=None,idle_timeout=c.idle_timeout,
+                 cache=c.cache,cache_location=c.cache_location,cache_size=c.cache_size,cache_ttls=None,
+                 cache_revalidate=c.cache_revalidate,store=c.store,file_type=c.file_type,
+                 instruments=c.instruments):
+        ## Set root URL
+        self.url_root = 'https://api.stlouisfed.org/fred'
+        ## Set default API key
+        self.api_key = api_key if api_key else None
+        ## Set default file type
+        self.response_type = response_type if response_type else None
+        ## Set SSL Verify
+        self.ssl_verify = ssl_verify
+        ## Set file type requested for structured responses
+        self.file_type = file_type
+        ## Set concurrency and rate limits
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        ## Set keep-alive transport
+        pool_size = pool_size if pool_size else max_concurrency
+        self.transport = Transport(pool_size=pool_size,idle_timeout=idle_timeout,
+                                   limiter=_rate_limiter(rate_limiter,calls_per_second),
+                                   retry=_retry_policy(retry),
+                                   cache=_response_cache(cache,cache_location,cache_size,cache_ttls,cache_revalidate),
+                                   instruments=_instruments(instruments))
+        self.instruments = self.transport.instruments
+        ## Set observation store
+        self.store = None
+        if store:
+            from fred.store import _observation_store
+            self.store = _observation_store(store)
+        ## Initiate clients
+        proxy = weakref.proxy(self)
+        self.category = AsyncCategoriesClient(proxy,CategoriesClient(proxy,self.api_key,self.url_root,self.response_type,self.ssl_verify))
+        self.release = AsyncReleasesClient(proxy,ReleasesClient(proxy,self.api_key,self.url_root,self.response_type,self.ssl_verify))
+        self.series = AsyncESeriesClient(proxy,ESeriesClient(proxy,self.api_key,self.url_root,self.response_type,self.ssl_verify))
+        self.tag = AsyncTagsClient(proxy,TagsClient(proxy,self.api_key,self.url_root,self.response_type,self.ssl_verify))
+        self.source = AsyncSourcesClient(proxy,SourcesClient(proxy,self.api_key,self.url_root,self.response_type,self.ssl_verify))
+
+    async def _run(self,method,*args,**kwargs):
+        """
+        Run a blocking client method on the worker pool once a concurrency
+        slot is available.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor,partial(method,*args,**kwargs))
+
+    def close(self):
+        """
+        Shut down the worker pool and close idle connections.
+        """
+        self._executor.shutdown(wait=True)
+        self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,*exc_info):
+        self.close()
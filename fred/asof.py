@@ -0,0 +1,129 @@
+from fred.helpers import _observation_columns, loads
+from fred.utils import _atomic_write
+import numpy as np
+import os
+
+## Combined (date, realtime_start) sort key: days of the date shifted past the largest realtime day
+_SHIFT = 1 << 22
+
+def _days(dates):
+    return np.asarray(dates,dtype='datetime64[D]').astype('int64')
+
+class AsOfIndex(object):
+    """
+    Point-in-time index of series observations. For each series it holds
+    every value FRED has ever reported, from ``output_type=1`` requests over
+    the full real-time period, paged 100000 rows at a time, as arrays of ``date``, ``realtime_start``,
+    ``realtime_end`` and ``value`` sorted by date and then realtime_start.
+    As-of lookups for whole vectors of dates are then binary searches on
+    those arrays, made locally.
+
+    ::
+
+        index = AsOfIndex(Fred(api_key='abcdefghijklmnopqrstuvwxyz123456'),location='/data/fred_asof')
+        index.values('GDP','2008-07-01',['2008-08-28','2008-09-26','2009-07-31'])
+        dates, values = index.latest('GDP',as_of_dates)
+
+    :arg client: :class:`fred.Fred` instance used for requests.
+    :arg str location: Directory the arrays of each series are kept in, so they are
+                       requested only once. None keeps them in memory.
+    """
+    def __init__(self,client=None,location=None):
+        self.client = client
+        self.location = location
+        self._series = {}
+        if location and not os.path.isdir(location):
+            os.makedirs(location)
+
+    def _path(self,series_id):
+        return os.path.join(self.location,'%s.npz' % series_id)
+
+    def add(self,series_id,refresh=False):
+        """
+        Index a series, requesting its real-time history unless it is already
+        indexed or stored under location, and return its arrays.
+
+        :arg str series_id: The id for a series. Required.
+        :arg bool refresh: Request the history again even if it is indexed.
+        """
+        if not refresh:
+            if series_id in self._series:
+                return self._series[series_id]
+            if self.location and os.path.isfile(self._path(series_id)):
+                with np.load(self._path(series_id)) as stored:
+                    columns = dict((name, stored[name]) for name in stored.files)
+                self._series[series_id] = columns
+                return columns
+        pages = self.client.series.observations(series_id,response_type='raw',paginate=True,
+                                                params={'output_type': 1,'realtime_start': '1776-07-04',
+                                                        'realtime_end': '9999-12-31','limit': 100000})
+        observations = _observation_columns([observation for page in pages for observation in loads(page)['observations']])
+        order = np.lexsort((observations['realtime_start'],observations['date']))
+        columns = dict((name, array[order]) for name, array in observations.items())
+        columns['key'] = _days(columns['date']) * _SHIFT + _days(columns['realtime_start'])
+        if self.location:
+            _atomic_write(self._path(series_id),lambda f: np.savez(f,**columns),mode='wb',suffix='.npz')
+        self._series[series_id] = columns
+        return columns
+
+    def values(self,series_id,dates,as_of):
+        """
+        Return the values observations had as known on as-of dates, NaN where
+        an observation was not yet released. dates and as_of are broadcast
+        against each other, so either may be a single date.
+
+        :arg str series_id: The id for a series. Required.
+        :arg dates: Observation date(s). Format "YYYY-MM-DD"
+        :arg as_of: Date(s) the values were known on. Format "YYYY-MM-DD"
+        """
+        columns = self.add(series_id)
+        dates, as_of = np.broadcast_arrays(_days(dates),_days(as_of))
+        rows = np.searchsorted(columns['key'],dates * _SHIFT + as_of,side='right') - 1
+        found = rows >= 0
+        rows = np.where(found,rows,0)
+        if len(columns['key']):
+            found &= (_days(columns['date'])[rows] == dates) & (_days(columns['realtime_end'])[rows] >= as_of)
+            values = columns['value'][rows]
+        else:
+            found &= False
+            values = np.zeros(rows.shape)
+        return np.where(found,values,np.nan)
+
+    def latest(self,series_id,as_of):
+        """
+        Return ``(dates, values)``: for each as-of date, the most recent
+        observation released by then and its value as known on that day.
+        Dates are NaT where nothing was released yet.
+
+        :arg str series_id: The id for a series. Required.
+        :arg as_of: Date(s) the observations were known on. Format "YYYY-MM-DD"
+        """
+        columns = self.add(series_id)
+        as_of = _days(as_of)
+        dates = _days(columns['date'])
+        ## First release of each observation date: the first row of its group
+        first = np.ones(len(dates),dtype=bool)
+        first[1:] = dates[1:] != dates[:-1]
+        released = _days(columns['realtime_start'])[first]
+        order = np.argsort(released,kind='mergesort')
+        newest = np.maximum.accumulate(dates[first][order]) if len(order) else dates[first]
+        rows = np.searchsorted(released[order],as_of,side='right') - 1
+        known = rows >= 0
+        latest = np.where(known,newest[np.where(known,rows,0)] if len(order) else 0,0)
+        values = np.where(known,self.values(series_id,latest,as_of),np.nan)
+        latest = np.where(known,latest,np.iinfo('int64').min).astype('datetime64[D]')
+        return latest, values
+
+    def series(self,series_id,as_of):
+        """
+        Return the observations of a series as known on one date, as a date-indexed
+        float64 pandas series. Requires pandas.
+
+        :arg str series_id: The id for a series. Required.
+        :arg str as_of: Date the observations were known on. Format "YYYY-MM-DD"
+        """
+        from pandas import DatetimeIndex, Series
+        columns = self.add(series_id)
+        day = _days(as_of)
+        known = (_days(columns['realtime_start']) <= day) & (_days(columns['realtime_end']) >= day)
+        return Series(columns['value'][known],index=DatetimeIndex(columns['date'][known],name='date'),name=series_id)
@@ -0,0 +1,258 @@
+from sys import version_info
+if version_info[0] >= 3:
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+else:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+from collections import OrderedDict
+from hashlib import sha1
+import os
+import struct
+import threading
+import time
+
+import fred.config as c
+from fred.utils import _atomic_write
+
+def _normalize_url(url):
+    """
+    Helper funcation that returns the cache key for a request url: the url
+    with its query parameters sorted and the api_key removed.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k != 'api_key')
+    return '%s://%s%s?%s' % (parts.scheme, parts.netloc, parts.path, urlencode(query))
+
+class ResponseCache(object):
+    """
+    Base class for caches of raw FRED responses. Entries are keyed on the
+    normalized request url, so a response is stored once whatever output
+    format it is later converted to, and expire after a time-to-live chosen
+    by the longest matching endpoint path prefix in ``ttls``.
+
+    Each entry also records when its content was last known to be current.
+    With ``revalidate`` set, an expired entry that a cheap check shows is
+    unchanged since then is renewed instead of downloaded again.
+
+    Subclasses implement ``_load``, ``_store``, ``_delete`` and ``clear``.
+
+    :arg dict ttls: Seconds a response stays fresh, by endpoint path prefix, e.g. ``{'/series/updates': 300}``.
+    :arg float default_ttl: Seconds a response stays fresh when no prefix in ttls matches.
+    :arg bool revalidate: Revalidate expired entries that support it instead of refetching them.
+    """
+    def __init__(self,ttls=None,default_ttl=c.cache_ttl,revalidate=c.cache_revalidate):
+        self.ttls = dict(c.cache_ttls if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.revalidate = revalidate
+
+    def ttl(self,path):
+        """
+        Return the time-to-live for an endpoint path such as '/series/observations?'.
+        """
+        path = path.rstrip('?')
+        matches = [p for p in self.ttls if path == p or path.startswith(p.rstrip('/') + '/')]
+        if not matches:
+            return self.default_ttl
+        return self.ttls[max(matches, key=len)]
+
+    def get(self,url):
+        """
+        Return the cached content for url, or None if it is missing or expired.
+        """
+        key = _normalize_url(url)
+        entry = self._load(key)
+        if entry is None:
+            return None
+        expires, validated, content = entry
+        if expires < time.time():
+            self._delete(key)
+            return None
+        return content
+
+    def get_entry(self,url):
+        """
+        Return the cached ``(expires, validated, content)`` for url whether or
+        not it has expired, or None if it is missing. ``validated`` is the
+        time the content was last known to be current.
+        """
+        return self._load(_normalize_url(url))
+
+    def set(self,url,content,path,validated=None):
+        """
+        Store the content fetched from url, which requested the endpoint path.
+        validated is the time the content was known to be current and
+        defaults to now.
+        """
+        now = time.time()
+        ttl = self.ttl(path)
+        if ttl > 0:
+            self._store(_normalize_url(url), now + ttl, validated if validated else now, content)
+
+    def _load(self,key):
+        raise NotImplementedError
+
+    def _store(self,key,expires,validated,content):
+        raise NotImplementedError
+
+    def _delete(self,key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+class MemoryCache(ResponseCache):
+    """
+    In-process response cache. Least recently used entries are evicted
+    once the cached content exceeds ``max_bytes``.
+
+    :arg int max_bytes: Size budget for cached content.
+    """
+    def __init__(self,max_bytes=c.cache_size,ttls=None,default_ttl=c.cache_ttl,revalidate=c.cache_revalidate):
+        super(MemoryCache, self).__init__(ttls,default_ttl,revalidate)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self,key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.pop(key)
+                self._entries[key] = entry
+        return entry
+
+    def _store(self,key,expires,validated,content):
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (expires, validated, content)
+            self._bytes += len(content)
+            while self._bytes > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self,key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def _delete(self,key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class DiskCache(ResponseCache):
+    """
+    Response cache stored as one file per entry under ``location``. Least
+    recently used files are evicted once the directory exceeds ``max_bytes``.
+    Recency is kept in file modification times, so a cache directory can be
+    reused across processes and runs. The directory is created and indexed
+    on first use rather than when the cache is built.
+
+    :arg str location: Directory holding the cache files.
+    :arg int max_bytes: Size budget for the cache directory.
+    """
+    _header = struct.Struct('>dd')
+
+    def __init__(self,location=c.cache_location,max_bytes=c.cache_size,ttls=None,default_ttl=c.cache_ttl,
+                 revalidate=c.cache_revalidate):
+        super(DiskCache, self).__init__(ttls,default_ttl,revalidate)
+        self.location = location
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._bytes = 0
+
+    def _open(self):
+        """
+        Create the cache directory and rebuild the LRU index from the files
+        already on disk. Called with the lock held.
+        """
+        if self._entries is not None:
+            return
+        if not os.path.isdir(self.location):
+            os.makedirs(self.location)
+        entries = []
+        for name in os.listdir(self.location):
+            if name.endswith('.cache'):
+                stat = os.stat(os.path.join(self.location, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._bytes = sum(self._entries.values())
+
+    def _name(self,key):
+        return sha1(key.encode('utf-8')).hexdigest() + '.cache'
+
+    def _load(self,key):
+        name = self._name(key)
+        path = os.path.join(self.location, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        with self._lock:
+            self._open()
+            if name in self._entries:
+                self._entries[name] = self._entries.pop(name)
+        expires, validated = self._header.unpack_from(data)
+        return expires, validated, data[self._header.size:]
+
+    def _store(self,key,expires,validated,content):
+        name = self._name(key)
+        data = self._header.pack(expires, validated) + content
+        with self._lock:
+            self._open()
+        _atomic_write(os.path.join(self.location, name), lambda f: f.write(data), mode='wb')
+        with self._lock:
+            self._bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._bytes += len(data)
+            evicted = []
+            while self._bytes > self.max_bytes and self._entries:
+                old, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                evicted.append(old)
+        for old in evicted:
+            self._remove(old)
+
+    def _remove(self,name):
+        try:
+            os.remove(os.path.join(self.location, name))
+        except OSError:
+            pass
+
+    def _delete(self,key):
+        name = self._name(key)
+        with self._lock:
+            self._open()
+            self._bytes -= self._entries.pop(name, 0)
+        self._remove(name)
+
+    def clear(self):
+        with self._lock:
+            self._open()
+            names, self._entries, self._bytes = list(self._entries), OrderedDict(), 0
+        for name in names:
+            self._remove(name)
+
+def _response_cache(cache=c.cache,location=c.cache_location,max_bytes=c.cache_size,ttls=None,
+                    revalidate=c.cache_revalidate):
+    """
+    Helper funcation that resolves the cache settings of a client: a
+    :class:`ResponseCache` instance is used as is, a false value disables
+    caching, and a true value builds a :class:`DiskCache` at location, or a
+    :class:`MemoryCache` when location is None.
+    """
+    if isinstance(cache, ResponseCache):
+        return cache
+    if not cache:
+        return None
+    if location:
+        return DiskCache(location,max_bytes,ttls,revalidate=revalidate)
+    return MemoryCache(max_bytes,ttls,revalidate=revalidate)
@@ -1,6 +1,9 @@
 
 from fred.utils import NamespacedClient, query_params
-from fred.helpers import _get_request
+from fred.helpers import _get_request, _iter_pages, loads
+from fred.tree import CategoryTree
+import fred.config as c
+from concurrent.futures import ThreadPoolExecutor
 
 class CategoriesClient(NamespacedClient):
     """
@@ -20,8 +23,8 @@ class CategoriesClient(NamespacedClient):
         path='/category?'
         params['category_id'] = category_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end')
@@ -40,10 +43,42 @@ class CategoriesClient(NamespacedClient):
         path='/category/children?'
         params['category_id'] = category_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
+    def walk(self,root=0,max_workers=None,snapshot=None):
+        """
+        Function to crawl the category hierarchy under a category breadth first.
+        The children of every category in a level are requested concurrently under
+        the client's rate limit. Returns a :class:`fred.tree.CategoryTree`, which
+        answers details, children and ancestry lookups without requests.
+
+        :arg int root: The id for the category to start from. 0 walks the full catalog.
+        :arg int max_workers: Maximum number of requests in flight at once.
+        :arg str snapshot: File to save the tree to, to be read back with ``CategoryTree.load``.
+        """
+        max_workers = max_workers if max_workers else c.max_concurrency
+        category = loads(self.details(root,response_type='raw'))['categories'][0]
+        categories = [(root, category.get('parent_id', root), category['name'])]
+        seen = set([root])
+        level = [root]
+        fetch = lambda category_id: loads(self.children(category_id,response_type='raw'))['categories']
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while level:
+                next_level = []
+                for category_id, children in zip(level,executor.map(fetch,level)):
+                    for child in children:
+                        if child['id'] not in seen:
+                            seen.add(child['id'])
+                            categories.append((child['id'], category_id, child['name']))
+                            next_level.append(child['id'])
+                level = next_level
+        tree = CategoryTree(root,categories)
+        if snapshot:
+            tree.save(snapshot)
+        return tree
+
     @query_params('realtime_start','realtime_end')
     def related(self,category_id=None,response_type=None,params=None):
         """
@@ -63,14 +98,14 @@ class CategoriesClient(NamespacedClient):
         path = '/category/related?'
         params['category_id'] = category_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','filter_variable', 'filter_value',
                   'tag_names','exclude_tag_names')
-    def series(self,category_id=None,response_type=None,params=None):
+    def series(self,category_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request a particular category's data series
         `<https://research.stlouisfed.org/docs/api/fred/category_series.html>`_
@@ -90,18 +125,21 @@ class CategoriesClient(NamespacedClient):
         :arg str filter_value: The value of the filter_variable attribute to filter results by.
         :arg str tag_names: Tag names used to match series. Separate with semicolon as in "income;bea"
         :arg str exclude_tag_names: Tag names used to exclude series. Separate with semicolon as in "income;bea"
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/category/series?'
         params['category_id'] = category_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','tag_names','tag_group_id','search_text')
-    def tags(self,category_id=None,response_type=None,params=None):
+    def tags(self,category_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request a particular category's FRED tags.
         FRED tags are attributes assigned to series.
@@ -124,18 +162,21 @@ class CategoriesClient(NamespacedClient):
         :arg str tag_names: Tag names to only include in the response. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/category/tags?'
         params['category_id'] = category_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','exclude_tag_names','tag_group_id','search_text')
-    def related_tags(self,category_id=None,tag_names=None,response_type=None,params=None):
+    def related_tags(self,category_id=None,tag_names=None,response_type=None,paginate=False,params=None):
         """
         Function to request FRED related tags for a particular category.
         FRED tags are attributes assigned to series.
@@ -159,11 +200,14 @@ class CategoriesClient(NamespacedClient):
         :arg str exclude_tag_names: Tag names to exclude. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/category/related_tags?'
         params['category_id'], params['tag_names'] = category_id, tag_names
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
@@ -1,11 +1,23 @@
 
 from fred.utils import NamespacedClient, query_params
-from fred.helpers import _get_request
+from fred.helpers import _get_request, _iter_pages, _has_pandas, _observations_frame, _vintage_panel, _fetch, _url_builder, _timestamp, loads
+import fred.config as c
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+## series.updates only reports series updated within the last two weeks
+_UPDATES_WINDOW = 14 * 24 * 60 * 60
+
+## Observations requests the observation store can answer
+_STORE_TYPES = ('df','numpy','dict')
+_STORE_PARAMS = set(['observation_start','observation_end'])
 
 class ESeriesClient(NamespacedClient):
     """
     Class for working with FRED series
     """
+    ## (window start, sweep time, {series_id: last_updated}) from the latest sweep_updates
+    _sweep = None
 
     @query_params('realtime_start','realtime_end')
     def details(self,series_id=None,response_type=None,params=None):
@@ -23,8 +35,8 @@ class ESeriesClient(NamespacedClient):
         path='/series?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end')
@@ -43,8 +55,8 @@ class ESeriesClient(NamespacedClient):
         path='/series/categories?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end')
@@ -63,8 +75,8 @@ class ESeriesClient(NamespacedClient):
         path='/series/release?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end',
@@ -88,13 +100,13 @@ class ESeriesClient(NamespacedClient):
         path = '/series/tags?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit',
                   'offset','filter_value')
-    def updates(self,series_id=None,response_type=None,params=None):
+    def updates(self,series_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request economic data series sorted by when observations
         were updated on the FRED server (attribute last_updated). Results are
@@ -110,18 +122,21 @@ class ESeriesClient(NamespacedClient):
         :arg int offset: Data offset. Options >=0
         :arg str filter_value: Limit results by geographic type of economic data series. Options are 'macro',
                                 'regional', and 'all'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/updates?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit',
                   'offset','sort_order')
-    def vintage_dates(self,series_id=None,response_type=None,params=None):
+    def vintage_dates(self,series_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request the dates in history when a series' data values were
         revised or new data values were released. Vintage dates are the release dates
@@ -136,20 +151,23 @@ class ESeriesClient(NamespacedClient):
         :arg int limit: The maximum number of results to return. Options 1 to 1000
         :arg int offset: Data offset. Options >=0
         :arg str sort_order: Sort results by vintage_date. Options are 'asc','desc'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/vintagedates?'
         params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit',
                   'offset','sort_order','observation_start','observation_end',
                   'units','frequency','aggregation_method','output_type',
                   'vintage_dates')
-    def observations(self,series_id=None,response_type=None,params=None):
+    def observations(self,series_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request the observations or data values for an economic data series.
         `<https://research.stlouisfed.org/docs/api/fred/series_observations.html>`_
@@ -173,19 +191,104 @@ class ESeriesClient(NamespacedClient):
                             'sum', 'eop'
         :arg int output_type: Output type. Options are 1, 2, 3, 4
         :arg str vintage_dates: Date(s) in history. Format "YYYY-MM-DD". Example for multiple dates "2000-01-01,2005-02-24,..."
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
+
+        When the client has an observation store, 'df', 'numpy' and 'dict' requests that only
+        set observation_start and observation_end, and do not paginate, are served from the store, which downloads
+        the full series on first use and again once it is older than the store's max_age.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/observations?'
-        params['series_id'] = series_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        if self.store is not None and not paginate and response_type in _STORE_TYPES and set(params) <= _STORE_PARAMS:
+            return self._stored_observations(series_id,response_type,params)
+        params['series_id'] = series_id
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        validator = lambda validated: self._unchanged_since(series_id,validated)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport,validator)
         return response
 
+    @query_params('realtime_start','realtime_end','observation_start','observation_end',
+                  'units','frequency','aggregation_method')
+    def observations_many(self,series_ids=None,max_workers=None,params=None):
+        """
+        Function to request the observations for several economic data series at once.
+        Requests are issued concurrently under the client's rate limit and the results
+        are aligned on date into a single data frame with one float64 column per series.
+        Requires pandas.
+
+        :arg list series_ids: The ids for the series. Required.
+        :arg int max_workers: Maximum number of requests in flight at once.
+        :arg str realtime_start: The start of the real-time period. Format "YYYY-MM-DD"
+        :arg str realtime_end: The end of the real-time period. Format "YYYY-MM-DD"
+        :arg str observation_start: The start of the observation period. Format "YYYY-MM-DD"
+        :arg str observation_end: The end of the observation period. Format "YYYY-MM-DD"
+        :arg str units: A key that indicates a data value transformation. Options are 'lin', 'chg', 'ch1', 'pch',
+                        'pc1', 'pca', 'cch', 'cca', 'log'
+        :arg str frequency: Indicates a lower frequency to aggregate values. Options are 'd', 'w',
+                            'bw', 'm', 'q', 'sa', 'a', 'wef', 'weth', 'wew', 'wetu', 'wem',
+                            'wesu', 'wesa', 'bwew', 'bwem'
+        :arg str aggregation_method: Indicates the aggregation method used for frequency aggregation. Options are  'avg',
+                            'sum', 'eop'
+        """
+        if not _has_pandas:
+            raise ImportError('observations_many requires pandas')
+        series_ids = list(series_ids)
+        max_workers = max_workers if max_workers else c.max_concurrency
+        fetch = lambda series_id: self.observations(series_id,response_type='raw',params=dict(params))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(fetch,series_ids))
+        return _observations_frame(series_ids,contents)
+
+    @query_params('observation_start','observation_end','units','frequency','aggregation_method')
+    def vintage_panel(self,series_id=None,start=None,end=None,output_type=2,max_workers=None,chunk_size=None,
+                      params=None):
+        """
+        Function to request every vintage of a series released in a real-time period as a
+        data frame of observation dates by vintage dates, the value each observation had in
+        each vintage. Vintage dates are requested in chunks of chunk_size, and the chunks
+        are fetched concurrently under the client's rate limit. Requires pandas.
+
+        :arg str series_id: The id for a series. Required.
+        :arg str start: The first vintage date to include. Format "YYYY-MM-DD"
+        :arg str end: The last vintage date to include. Format "YYYY-MM-DD"
+        :arg int output_type: 2 requests every observation of each vintage. 3 requests only new and
+                              revised observations, which is smaller, and fills the rest forward
+                              from the previous vintage.
+        :arg int max_workers: Maximum number of requests in flight at once.
+        :arg int chunk_size: Vintage dates per request.
+        :arg str observation_start: The start of the observation period. Format "YYYY-MM-DD"
+        :arg str observation_end: The end of the observation period. Format "YYYY-MM-DD"
+        :arg str units: A key that indicates a data value transformation. Options are 'lin', 'chg', 'ch1', 'pch',
+                        'pc1', 'pca', 'cch', 'cca', 'log'
+        :arg str frequency: Indicates a lower frequency to aggregate values. Options are 'd', 'w',
+                            'bw', 'm', 'q', 'sa', 'a', 'wef', 'weth', 'wew', 'wetu', 'wem',
+                            'wesu', 'wesa', 'bwew', 'bwem'
+        :arg str aggregation_method: Indicates the aggregation method used for frequency aggregation. Options are  'avg',
+                            'sum', 'eop'
+        """
+        if not _has_pandas:
+            raise ImportError('vintage_panel requires pandas')
+        if output_type not in (2, 3):
+            raise ValueError('output_type must be 2 or 3')
+        window = {'realtime_start': start,'realtime_end': end,'limit': 10000}
+        vintages = [vintage for page in self.vintage_dates(series_id,response_type='raw',paginate=True,params=window)
+                    for vintage in loads(page)['vintage_dates']]
+        chunk_size = chunk_size if chunk_size else c.vintage_chunk_size
+        chunks = [vintages[i:i + chunk_size] for i in range(0, len(vintages), chunk_size)]
+        max_workers = max_workers if max_workers else c.max_concurrency
+        fetch = lambda chunk: self.observations(series_id,response_type='raw',
+                                                params=dict(params,output_type=output_type,vintage_dates=','.join(chunk)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(fetch,chunks))
+        return _vintage_panel(vintages,chunks,contents,fill=output_type == 3)
+
     @query_params('search_type','realtime_start','realtime_end',
                   'limit','offset','order_by','sort_order','filter_variable',
                   'filter_value','tag_names','exclude_tag_names')
-    def search(self,search_text=None,response_type=None,params=None):
+    def search(self,search_text=None,response_type=None,paginate=False,params=None):
         """
         Function to request economic data series that match search text.
         `<https://research.stlouisfed.org/docs/api/fred/series_search.html>`_
@@ -206,19 +309,22 @@ class ESeriesClient(NamespacedClient):
         :arg str filter_value: The value of the filter_variable attribute to filter results by.
         :arg str tag_names: Tag names used to match series. Separate with semicolon as in "income;bea"
         :arg str exclude_tag_names: Tag names used to exclude series. Separate with semicolon as in "income;bea"
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/search?'
         params['search_text'] = search_text
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end',
                       'limit','offset','order_by','sort_order','tag_names',
                       'tag_group_id','tag_search_text')
-    def search_tags(self,series_search_text=None,response_type=None,params=None):
+    def search_tags(self,series_search_text=None,response_type=None,paginate=False,params=None):
         """
         Function to request the FRED tags for a series search.
         `<https://research.stlouisfed.org/docs/api/fred/series_search_tags.html>`_
@@ -236,19 +342,22 @@ class ESeriesClient(NamespacedClient):
         :arg str tag_names: Tag names that series match. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str tag_search_text: The words to find matching tags with.
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/search/tags?'
         params['series_search_text'] = series_search_text
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end',
                       'limit','offset','order_by','sort_order',
                       'tag_group_id','tag_search_text','exclude_tag_names')
-    def search_related_tags(self,series_search_text=None,tag_names=None,response_type=None,params=None):
+    def search_related_tags(self,series_search_text=None,tag_names=None,response_type=None,paginate=False,params=None):
         """
         Function to request the related FRED tags for one or more FRED tags matching a series search.
         `<https://research.stlouisfed.org/docs/api/fred/series_search_related_tags.html>`_
@@ -267,11 +376,76 @@ class ESeriesClient(NamespacedClient):
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str tag_search_text: The words to find matching tags with.
         :arg str exclude_tag_names: Tag names to exclude. Separate with semicolon as in "income;bea"
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/series/search/related_tags?'
         params['series_search_text'], params['tag_names'] = series_search_text, tag_names
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
+
+    def sweep_updates(self,filter_value='all'):
+        """
+        Function to record when each series updated within the last two weeks last changed,
+        using one paged series.updates sweep. While the sweep is recent, cached observations
+        are revalidated against it instead of with a series.details request per series.
+
+        :arg str filter_value: Limit results by geographic type of economic data series. Options are 'macro',
+                                'regional', and 'all'
+        """
+        ## A page may come from the cache, so date the sweep from the oldest it can be
+        cache = self.transport.cache
+        swept = time.time() - (cache.ttl('/series/updates?') if cache else 0)
+        last_updated = {}
+        for page in self.updates(response_type='raw',paginate=True,params={'filter_value': filter_value}):
+            for series in loads(page)['seriess']:
+                last_updated[series['id']] = _timestamp(series['last_updated'])
+        self._sweep = (swept - _UPDATES_WINDOW, swept, last_updated)
+        return len(last_updated)
+
+    def _fresh(self,path,params):
+        """
+        Request a raw json response from FRED past the response cache, and
+        put it in place of the cached copy.
+        """
+        params = dict(params,file_type='json')
+        return _get_request(self.url_root,self.api_key,path,'raw',params,self.ssl_verify,self.transport,refresh=True)
+
+    def _stored_observations(self,series_id,response_type,params):
+        """
+        Answer an observations request from the observation store, storing
+        the full series first if it is missing or too old.
+        """
+        if not self.store.fresh(series_id):
+            validator = lambda validated: self._unchanged_since(series_id,validated)
+            content = _get_request(self.url_root,self.api_key,'/series/observations?','raw',
+                                   {'series_id': series_id,'file_type': 'json'},self.ssl_verify,self.transport,validator)
+            self.store.write_content(series_id,content)
+        if response_type == 'dict':
+            return self.store.records(series_id,params.get('observation_start'),params.get('observation_end'))
+        frame = self.store.frame(series_id,params.get('observation_start'),params.get('observation_end'))
+        if response_type == 'df':
+            return frame
+        return frame.values
+
+    def _last_updated(self,series_id):
+        """
+        Request when a series last changed, bypassing the cache.
+        """
+        url = _url_builder(self.url_root,self.api_key,'/series?',{'series_id': series_id,'file_type': 'json'})
+        content = _fetch(url,self.ssl_verify,self.transport)
+        return _timestamp(loads(content)['seriess'][0]['last_updated'])
+
+    def _unchanged_since(self,series_id,validated):
+        """
+        Whether a series has not changed since the time validated.
+        """
+        if self._sweep is not None:
+            window_start, swept, last_updated = self._sweep
+            if window_start <= validated < swept:
+                return last_updated.get(series_id, window_start) <= validated
+        return self._last_updated(series_id) <= validated
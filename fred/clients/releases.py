@@ -1,6 +1,6 @@
 
 from fred.utils import NamespacedClient, query_params
-from fred.helpers import _get_request
+from fred.helpers import _get_request, _iter_pages
 
 class ReleasesClient(NamespacedClient):
     """
@@ -9,7 +9,7 @@ class ReleasesClient(NamespacedClient):
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order')
-    def all_releases(self,response_type=None,params=None):
+    def all_releases(self,response_type=None,paginate=False,params=None):
         """
         Function to request all releases of economic data.
         `<https://research.stlouisfed.org/docs/api/fred/releases.html>`_
@@ -23,17 +23,20 @@ class ReleasesClient(NamespacedClient):
         :arg str order_by: Order results by values of the specified attribute. Options are  'release_id',
                             'name', 'press_release', 'realtime_start', 'realtime_end'
         :arg str sort_order: Sort results for attribute values specified by order_by. Options are 'asc','desc'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/releases?'
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','include_release_dates_with_no_data')
-    def all_dates(self,response_type=None,params=None):
+    def all_dates(self,response_type=None,paginate=False,params=None):
         """
         Function to request release dates for all releases of economic data.
         `<https://research.stlouisfed.org/docs/api/fred/releases_dates.html>`_
@@ -49,12 +52,15 @@ class ReleasesClient(NamespacedClient):
         :arg str sort_order: Sort results for attribute values specified by order_by. Options are 'asc','desc'
         :arg str include_release_dates_with_no_data: Determines whether release dates with no data available are returned.
                                     Options are 'true', 'false'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/releases/dates?'
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end')
@@ -73,8 +79,8 @@ class ReleasesClient(NamespacedClient):
         path='/release?'
         params['release_id'] = release_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end')
@@ -93,13 +99,13 @@ class ReleasesClient(NamespacedClient):
         path='/release/sources?'
         params['release_id'] = release_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'sort_order','include_release_dates_with_no_data')
-    def dates(self,release_id=None,response_type=None,params=None):
+    def dates(self,release_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request release dates for a particular release of economic data.
         Note that release dates are published by data sources and do not necessarily
@@ -116,19 +122,22 @@ class ReleasesClient(NamespacedClient):
         :arg str sort_order: Sort results is ascending or descending release date order. Options are 'asc','desc'
         :arg str include_release_dates_with_no_data: Determines whether release dates with no data available are returned.
                                     Options are 'true', 'false'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/release/dates?'
         params['release_id'] = release_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','filter_variable', 'filter_value',
                   'tag_names','exclude_tag_names')
-    def series(self,release_id=None,response_type=None,params=None):
+    def series(self,release_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request the series on a release of economic data.
         `<https://research.stlouisfed.org/docs/api/fred/release_series.html>`_
@@ -148,18 +157,21 @@ class ReleasesClient(NamespacedClient):
         :arg str filter_value: The value of the filter_variable attribute to filter results by.
         :arg str tag_names: Tag names used to match series. Separate with semicolon as in "income;bea"
         :arg str exclude_tag_names: Tag names used to exclude series. Separate with semicolon as in "income;bea"
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/release/series?'
         params['release_id'] = release_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','tag_names','tag_group_id','search_text')
-    def tags(self,release_id=None,response_type=None,params=None):
+    def tags(self,release_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request FRED tags for a particular release.
         FRED tags are attributes assigned to series.
@@ -181,18 +193,21 @@ class ReleasesClient(NamespacedClient):
         :arg str tag_names: Tag names that series match. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/release/tags?'
         params['release_id'] = release_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','exclude_tag_names','tag_group_id','search_text')
-    def related_tags(self,release_id=None,tag_names=None,response_type=None,params=None):
+    def related_tags(self,release_id=None,tag_names=None,response_type=None,paginate=False,params=None):
         """
         Function to request FRED related tags for a particular release.
         FRED tags are attributes assigned to series.
@@ -215,11 +230,14 @@ class ReleasesClient(NamespacedClient):
         :arg str exclude_tag_names: Tag names to exclude. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/release/related_tags?'
         params['release_id'], params['tag_names'] = release_id, tag_names
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
@@ -1,6 +1,6 @@
 
 from fred.utils import NamespacedClient, query_params
-from fred.helpers import _get_request
+from fred.helpers import _get_request, _iter_pages
 
 class SourcesClient(NamespacedClient):
     """
@@ -22,13 +22,13 @@ class SourcesClient(NamespacedClient):
         path='/source?'
         params['source_id'] = source_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit',
                   'offset','sort_order','order_by')
-    def sources(self,response_type=None,params=None):
+    def sources(self,response_type=None,paginate=False,params=None):
         """
         Function to request all sources of economic data.
         `<https://research.stlouisfed.org/docs/api/fred/sources.html>`_
@@ -42,17 +42,20 @@ class SourcesClient(NamespacedClient):
         :arg str order_by: Order results by values of the specified attribute. Options are 'source_id',
                             'name', 'realtime_start', 'realtime_end'
         :arg str sort_order: Sort results for attribute values specified by order_by. Options are 'asc','desc'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/sources?'
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order')
-    def releases(self,source_id=None,response_type=None,params=None):
+    def releases(self,source_id=None,response_type=None,paginate=False,params=None):
         """
         Function to request all releases of economic data.
         `<https://research.stlouisfed.org/docs/api/fred/releases.html>`_
@@ -67,11 +70,14 @@ class SourcesClient(NamespacedClient):
         :arg str order_by: Order results by values of the specified attribute. Options are 'source_id',
                             'name', 'realtime_start', 'realtime_end'
         :arg str sort_order: Sort results for attribute values specified by order_by. Options are 'asc','desc'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/source/releases?'
         params['source_id'] = source_id
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
@@ -1,6 +1,6 @@
 
 from fred.utils import NamespacedClient, query_params
-from fred.helpers import _get_request
+from fred.helpers import _get_request, _iter_pages
 
 class TagsClient(NamespacedClient):
     """
@@ -8,7 +8,7 @@ class TagsClient(NamespacedClient):
     """
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','exclude_tag_names')
-    def series(self,tag_names=None,response_type=None,params=None):
+    def series(self,tag_names=None,response_type=None,paginate=False,params=None):
         """
         Function to request series matching all tags in the tag_names parameter.
         `<https://research.stlouisfed.org/docs/api/fred/category_series.html>`_
@@ -25,18 +25,21 @@ class TagsClient(NamespacedClient):
                             'last_updated', 'observation_start', 'observation_end', 'popularity'
         :arg str sort_order: Sort results for attribute values specified by order_by. Options are 'asc','desc'
         :arg str exclude_tag_names: Tag names used to exclude series. Separate with semicolon as in "income;bea"
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/tags/series?'
         params['tag_names'] = tag_names
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','tag_names','tag_group_id','search_text')
-    def tags(self,response_type=None,params=None):
+    def tags(self,response_type=None,paginate=False,params=None):
         """
         Function to request FRED tags.
         FRED tags are attributes assigned to series.
@@ -54,17 +57,20 @@ class TagsClient(NamespacedClient):
         :arg str tag_names: Tag names to only include in the response. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path = '/tags?'
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
 
     @query_params('realtime_start','realtime_end','limit','offset',
                   'order_by','sort_order','exclude_tag_names','tag_group_id','search_text')
-    def related_tags(self,tag_names=None,response_type=None,params=None):
+    def related_tags(self,tag_names=None,response_type=None,paginate=False,params=None):
         """
         Function to request FRED related tags.
         FRED tags are attributes assigned to series.
@@ -83,11 +89,14 @@ class TagsClient(NamespacedClient):
         :arg str exclude_tag_names: Tag names to exclude. Separate with semicolon as in "income;bea"
         :arg str tag_group_id: Tag ID to filter tags by. Options are 'freq', 'gen', 'geo', 'geot', 'rls', 'seas', 'src'
         :arg str search_text: The words to find matching tags with. For example 'mortgage rates'
+        :arg bool paginate: Iterate over all results one page at a time, with limit results per page.
         :arg bool ssl_verify: To verify HTTPs.
         """
         path='/related_tags?'
         params['tag_names'] = tag_names
         response_type = response_type if response_type else self.response_type
-        if response_type != 'xml': params['file_type'] = 'json'
-        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify)
+        params['file_type'] = self._file_type(response_type)
+        if paginate:
+            return _iter_pages(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
+        response = _get_request(self.url_root,self.api_key,path,response_type,params,self.ssl_verify,self.transport)
         return response
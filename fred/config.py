@@ -27,5 +27,124 @@ dates = [
         'created'
         ]
 
+## Column types of each response data type, so responses are converted without type inference.
+## dates are "YYYY-MM-DD", timestamps "YYYY-MM-DD HH:MM:SS" (the UTC offset FRED appends is dropped),
+## numerics are coerced to numbers ("." becomes NaN; '*' means every other column) and
+## categories are low-cardinality strings stored as the pandas category dtype
+schema = {
+         'categories': {'numerics': ['id','parent_id']},
+         'seriess': {'dates': ['realtime_start','realtime_end','observation_start','observation_end'],
+                     'timestamps': ['last_updated'],
+                     'numerics': ['popularity','group_popularity'],
+                     'categories': ['frequency','frequency_short','units','units_short',
+                                    'seasonal_adjustment','seasonal_adjustment_short']},
+         'tags': {'timestamps': ['created'],
+                  'numerics': ['popularity','series_count'],
+                  'categories': ['group_id']},
+         'releases': {'dates': ['realtime_start','realtime_end'],
+                      'numerics': ['id']},
+         'release_dates': {'dates': ['date'],
+                           'numerics': ['release_id'],
+                           'categories': ['release_name']},
+         'sources': {'dates': ['realtime_start','realtime_end'],
+                     'numerics': ['id']},
+         'vintage_dates': {'dates': [0]},
+         'observations': {'dates': ['realtime_start','realtime_end','date'],
+                          'numerics': '*'}
+         }
+
+## Fields of each response data type, as documented by FRED. The delimited response types
+## (csv, tab, pipe) always include them, so optional fields such as notes are kept when
+## the first records of a response leave them out
+fields = {
+         'categories': ['id','name','parent_id','notes'],
+         'seriess': ['id','realtime_start','realtime_end','title','observation_start','observation_end',
+                     'frequency','frequency_short','units','units_short','seasonal_adjustment',
+                     'seasonal_adjustment_short','last_updated','popularity','group_popularity','notes'],
+         'tags': ['name','group_id','notes','created','popularity','series_count'],
+         'releases': ['id','realtime_start','realtime_end','name','press_release','link','notes'],
+         'release_dates': ['release_id','release_name','date'],
+         'sources': ['id','realtime_start','realtime_end','name','link','notes'],
+         'vintage_dates': ['vintage_dates']
+         }
+
+## File type requested from FRED for the dict, df, numpy, csv, tab and pipe response types.
+## 'xml', like the default response type, lets them share cached responses with response_type 'xml'
+file_type = 'xml'
+
 ## SSL Verify HTTPS
-ssl_verify = True
\ No newline at end of file
+ssl_verify = True
+
+## Connection pool: idle connections kept per host and seconds before an idle one is dropped
+pool_size = 10
+idle_timeout = 30
+
+## Socket timeout in seconds
+timeout = 60
+
+## Rate limit: requests per second allowed by FRED for one API key
+calls_per_second = 20
+
+## Rate limiter: True shares one limit between the clients of a process, a path shares it
+## between processes through that file, False disables it
+rate_limiter = True
+rate_limit_location = '/tmp/fred.limit'
+
+## Seconds every client sharing a limiter pauses after a 429 without a Retry-After header
+rate_limit_pause = 5
+
+## Retries of failed requests: on/off, maximum retries, base and maximum backoff in seconds,
+## and the HTTP statuses retried (rate limited and server errors); connection errors are retried too
+retry = True
+retries = 5
+retry_backoff = 0.5
+retry_max_backoff = 60
+retry_statuses = (429, 500, 502, 503, 504)
+
+## Instrumentation: per endpoint path request counters and stage timings (see fred.metrics),
+## and the upper bounds in seconds of the stage timing histogram buckets
+instruments = False
+metrics_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+## Vintage dates requested at once by series.vintage_panel
+vintage_chunk_size = 100
+
+## Async client: maximum number of requests in flight at once
+max_concurrency = 10
+
+## Response cache: on/off, directory (None keeps it in memory) and size budget in bytes
+cache = True
+cache_location = '/tmp/fred_cache'
+cache_size = 1000000000
+
+## Check whether expired series observations changed (via last_updated) before downloading them again
+cache_revalidate = False
+
+## Seconds a cached response stays fresh, by longest matching endpoint path prefix
+cache_ttl = 3600
+cache_ttls = {
+             '/series/updates': 300,
+             '/series/observations': 3600,
+             '/series/vintagedates': 3600,
+             '/releases/dates': 3600,
+             '/release/dates': 3600,
+             '/release': 86400,
+             '/releases': 86400,
+             '/tags': 86400,
+             '/related_tags': 86400,
+             '/category': 604800,
+             '/source': 604800,
+             '/sources': 604800
+             }
+
+## Incremental sync: trailing observations requested again when a new vintage is released
+sync_lookback = 12
+
+## Release scheduler: seconds between polls of the release calendar
+release_poll_interval = 300
+
+## Observation store: directory of the read-through store for series observations (None disables it)
+## and seconds a stored series is served before it is downloaded again (None never expires)
+store = None
+store_location = '/tmp/fred_store'
+store_max_age = 86400
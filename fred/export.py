@@ -0,0 +1,40 @@
+from fred.helpers import _delimited
+
+def rows(contents,sep=','):
+    """
+    Yield the records of raw json responses as lines of delimited values,
+    header first. Records are decoded one response at a time and no data
+    frame is built, so exporting the pages of a paginated request holds a
+    single page in memory at a time. The header has the fields of the first
+    page and the known fields of its data type; a later field outside it
+    raises ValueError:
+
+    ::
+
+        pages = fr.release.series(51,response_type='json',paginate=True)
+        for line in rows(pages,sep='\\t'):
+            ...
+
+    :arg contents: A raw json response, or an iterable of them such as the pages of a paginated request.
+    :arg str sep: Field delimiter, e.g. ',' (csv), '\\t' (tab) or '|' (pipe).
+    """
+    return _delimited(contents,sep)
+
+def write(contents,out,sep=','):
+    """
+    Write the records of raw json responses to a file-like object as
+    delimited values, header first, and return the number of records written.
+
+    ::
+
+        with open('release_51.csv','w') as f:
+            write(fr.release.series(51,response_type='json',paginate=True),f)
+
+    :arg contents: A raw json response, or an iterable of them such as the pages of a paginated request.
+    :arg out: File-like object opened for writing text.
+    :arg str sep: Field delimiter, e.g. ',' (csv), '\\t' (tab) or '|' (pipe).
+    """
+    count = -1
+    for count, line in enumerate(_delimited(contents,sep)):
+        out.write(line)
+    return max(count, 0)
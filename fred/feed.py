@@ -0,0 +1,106 @@
+from fred.helpers import loads, _timestamp
+from fred.utils import _atomic_write
+from json import dump, load
+import os
+
+class UpdateFeed(object):
+    """
+    Change feed over ``series.updates``. Each read pages through the series
+    updated in the last two weeks, newest first, and stops at the first one
+    already consumed, so a frequent consumer requests only the first pages. New
+    updates are emitted oldest first as the series records FRED returns
+    (``id``, ``last_updated``, ``title`` and so on), optionally only for the
+    series of a watchlist.
+
+    The checkpoint is the newest ``last_updated`` consumed, with the ids of
+    the series updated at that moment, and is kept in a file when a path is
+    given. It advances when every event of a read has been consumed, so
+    events a consumer stopped early on are emitted again by the next read.
+
+    ::
+
+        feed = UpdateFeed(Fred(api_key='abcdefghijklmnopqrstuvwxyz123456'),checkpoint='/data/fred_updates.json',
+                          watchlist=['GDP','CPIAUCSL','UNRATE'])
+        for series in feed.events():
+            invalidate(series['id'])
+
+    Updates older than two weeks are not reported by FRED, so a consumer
+    that reads less often than that misses changes.
+
+    :arg client: :class:`fred.Fred` instance used for requests.
+    :arg str checkpoint: File the checkpoint is kept in. None keeps it in memory.
+    :arg watchlist: Ids of the series to emit updates for. None emits every update.
+    :arg str filter_value: Limit results by geographic type of economic data series. Options are 'macro',
+                            'regional', and 'all'
+    """
+    def __init__(self,client,checkpoint=None,watchlist=None,filter_value='all'):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.watchlist = set(watchlist) if watchlist is not None else None
+        self.filter_value = filter_value
+        self.last_updated = None
+        self.seen = set()
+        if checkpoint and os.path.isfile(checkpoint):
+            with open(checkpoint) as f:
+                saved = load(f)
+            self.last_updated = saved['last_updated']
+            self.seen = set(saved['seen'])
+
+    def _new(self,series):
+        if self.last_updated is None:
+            return True
+        updated, checkpoint = _timestamp(series['last_updated']), _timestamp(self.last_updated)
+        return updated > checkpoint or (updated == checkpoint and series['id'] not in self.seen)
+
+    def pending(self):
+        """
+        Return the updates not yet consumed, oldest first, without emitting
+        them or moving the checkpoint.
+        """
+        pages = self.client.series.updates(response_type='raw',paginate=True,
+                                           params={'filter_value': self.filter_value,'limit': 1000})
+        pending = []
+        for series in (series for page in pages for series in loads(page)['seriess']):
+            if self._new(series):
+                pending.append(series)
+            elif _timestamp(series['last_updated']) < _timestamp(self.last_updated):
+                ## Updates are listed newest first, so the rest were consumed too
+                break
+        pending.reverse()
+        return pending
+
+    def events(self):
+        """
+        Yield the updates not yet consumed, oldest first, and move the
+        checkpoint past them once they have all been consumed.
+        """
+        pending = self.pending()
+        for series in pending:
+            if self.watchlist is None or series['id'] in self.watchlist:
+                yield series
+        if pending:
+            self.commit(pending)
+
+    def poll(self,callback):
+        """
+        Call callback with each update not yet consumed, oldest first, and
+        return how many were emitted.
+        """
+        emitted = 0
+        for series in self.events():
+            callback(series)
+            emitted += 1
+        return emitted
+
+    def commit(self,consumed):
+        """
+        Move the checkpoint past consumed updates and save it.
+        """
+        for series in consumed:
+            if self.last_updated is None or _timestamp(series['last_updated']) > _timestamp(self.last_updated):
+                self.last_updated = series['last_updated']
+                self.seen = set()
+            if _timestamp(series['last_updated']) == _timestamp(self.last_updated):
+                self.seen.add(series['id'])
+        if self.checkpoint:
+            _atomic_write(self.checkpoint,lambda f: dump({'last_updated': self.last_updated,'seen': sorted(self.seen)},f))
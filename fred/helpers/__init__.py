@@ -1,93 +1,411 @@
 from sys import version_info
 if version_info[0] >= 3:
     from urllib.parse import urlencode
-    from urllib.request import Request, urlopen
-    import ssl
+    from urllib.error import HTTPError, URLError
 else:
     from urllib import urlencode
-    from urllib2 import Request, urlopen
-    import ssl
+    from urllib2 import HTTPError, URLError
 
 import fred.config as c
-from json import loads
+from fred.transport import Transport
+from fred.cache import _normalize_url
+from fred.limiter import _rate_limiter, _retry_after
+from fred.retry import _retry_policy
+from fred.metrics import _timed
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree.ElementTree import fromstring, iterparse
+from io import BytesIO
+from datetime import datetime, timedelta
+from json import JSONDecoder
+from time import time, sleep
+import csv
+import re
 
+## Parse json with orjson when it is installed
 try:
-    from pandas import DataFrame
-    _has_pandas = True
+    from orjson import loads
 except ImportError:
-    DataFrame = None
-    _has_pandas = False
+    from json import loads
+
+## pandas is imported on first use by the data frame response types, so
+## clients that only request xml or json never load it
+if version_info[0] >= 3:
+    from importlib.util import find_spec
+    _has_pandas = find_spec('pandas') is not None
+else:
+    from imp import find_module
+    try:
+        find_module('pandas')
+        _has_pandas = True
+    except ImportError:
+        _has_pandas = False
+
+## Fields and column order of a plain observations response
+_observation_fields = set(['realtime_start','realtime_end','date','value'])
+_observation_order = ['realtime_start','realtime_end','date','value']
 
-# consider putting this in ~/.fred or env var
-_USE_JOBLIB_CACHE = True
-_THROTTLE_REQUESTS = True
+## Incremental json decoding of the records in a response
+_decoder = JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
 
-def _fetch(url, ssl_verify = True):
+## Shared transport for calls made without a Fred instance
+_default_transport = Transport(limiter=_rate_limiter(),retry=_retry_policy())
+
+def _fetch(url, ssl_verify = True, transport = None, record = None):
     """
-    Helper funcation to fetch content from a given url.
+    Helper funcation to fetch content from a given url over a
+    pooled keep-alive connection, within the transport's rate limit.
+    Failures are retried as the transport's retry policy allows. A 429
+    response, retried or not, pauses every client sharing the limiter for
+    at least the Retry-After delay. Waits, network time, retries and bytes are
+    added to record, the instrumentation record of the request, if given.
     """
-    req = Request(url)
-    if ssl_verify:
-        page = urlopen(req)
-    else:
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+    transport = transport if transport else _default_transport
+    limiter = transport.limiter
+    retry = transport.retry
+    attempt = 0
+    while True:
+        if limiter:
+            started = time()
+            limiter.acquire()
+            _timed(record, 'rate_limit', started)
+        if retry:
+            retry.record('request')
+        started = time()
+        try:
+            content = transport.fetch(url, ssl_verify)
+            _timed(record, 'network', started)
+            if record is not None:
+                record['bytes'] += len(content)
+            return content
+        except URLError as e:
+            _timed(record, 'network', started)
+            reason = e.code if isinstance(e, HTTPError) else 'connection'
+            ## Pause the clients sharing the limiter whether or not this request is retried
+            if reason == 429 and limiter:
+                limiter.penalize(_retry_after(e.headers))
+            if not retry or attempt >= retry.retries or not retry.retryable(e):
+                if retry:
+                    retry.record('failure')
+                raise
+            wait = retry.delay(attempt)
+            if reason == 429:
+                wait = max(wait, _retry_after(e.headers))
+            retry.record('retry', reason, wait)
+            if record is not None:
+                record['retries'] += 1
+            if reason == 429 and limiter:
+                limiter.penalize(wait)
+            else:
+                started = time()
+                sleep(wait)
+                _timed(record, 'retry_wait', started)
+            attempt += 1
 
-        page = urlopen(req, context=ctx)
-    content = page.read().decode('utf-8')
-    page.close()
-    return content
+def _timestamp(last_updated):
+    """
+    Helper funcation that converts a FRED last_updated value such as
+    "2016-01-07 16:46:02-06" to seconds since the epoch.
+    """
+    moment = datetime.strptime(last_updated[:19], '%Y-%m-%d %H:%M:%S')
+    offset = last_updated[19:].replace(':', '')
+    if offset:
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].ljust(4, '0')
+        moment -= sign * timedelta(hours=int(offset[:2]), minutes=int(offset[2:]))
+    return (moment - datetime(1970, 1, 1)).total_seconds()
 
 def _url_builder(url_root,api_key,path,params):
     """
     Helper funcation to build a parameterized url.
     """
     params['api_key'] = api_key
-    url_end = urlencode(params)
+    url_end = urlencode([(k, v) for k, v in params.items() if v is not None])
     url = "%s%s%s" % (url_root,path,url_end)
     return url
 
-def _convert(frame):
+def _converters(key):
     """
-    Helper funcation to build a parameterized url.
+    Helper funcation that maps each typed column of a response data type,
+    per fred.config.schema, to its vectorized conversion.
+    """
+    from pandas import to_datetime, to_numeric
+    schema = c.schema.get(key, {})
+    converters = {}
+    for column in schema.get('dates', []):
+        converters[column] = lambda s: to_datetime(s,format='%Y-%m-%d',errors='coerce')
+    for column in schema.get('timestamps', []):
+        converters[column] = lambda s: to_datetime(s.str[:19],format='%Y-%m-%d %H:%M:%S',errors='coerce')
+    numerics = schema.get('numerics', [])
+    if numerics != '*':
+        for column in numerics:
+            converters[column] = lambda s: to_numeric(s,errors='coerce')
+    for column in schema.get('categories', []):
+        converters[column] = lambda s: s.astype('category')
+    return converters, numerics == '*'
+
+def _convert(frame, key):
     """
-    frame = frame.convert_objects(convert_numeric=True)
+    Helper funcation that converts the columns of a response data frame
+    to the types listed for its data type in fred.config.schema.
+    """
+    from pandas import DataFrame, to_numeric
+    converters, numeric_rest = _converters(key)
+    columns = {}
     for column in frame:
-        if column in c.dates:
-            frame[column] = frame[column].astype('datetime64')
-    return frame
+        if column in converters:
+            columns[column] = converters[column](frame[column])
+        elif numeric_rest:
+            columns[column] = to_numeric(frame[column],errors='coerce')
+        else:
+            columns[column] = frame[column]
+    return DataFrame(columns,columns=frame.columns,index=frame.index)
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+def _parse_timestamp(value):
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+
+def _parse_number(value):
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float('nan')
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def _typed_records(key, records):
+    """
+    Helper funcation that converts the fields of response records, in
+    place, to the types listed for their data type in fred.config.schema:
+    datetimes for dates and timestamps, and numbers for numerics, with
+    NaN for the "." FRED reports for missing values. Listed numerics are
+    ids and counts and become ints; the columns of '*' numerics, such as
+    observation values, always become floats. Parsed dates are reused, as
+    the same few dates repeat across records.
+    """
+    schema = c.schema.get(key, {})
+    parsers = {}
+    for column in schema.get('dates', []):
+        parsers[column] = _parse_date
+    for column in schema.get('timestamps', []):
+        parsers[column] = _parse_timestamp
+    numerics = schema.get('numerics', [])
+    if numerics != '*':
+        for column in numerics:
+            parsers[column] = _parse_number
+    memo = {}
+    for record in records:
+        for column, value in record.items():
+            parser = parsers.get(column, _parse_float if numerics == '*' else None)
+            if parser is _parse_date or parser is _parse_timestamp:
+                parsed = memo.get((parser, value))
+                if parsed is None:
+                    parsed = memo[(parser, value)] = parser(value)
+                record[column] = parsed
+            elif parser is not None:
+                record[column] = parser(value)
+    return records
+
+def _is_xml(content):
+    """
+    Helper funcation that tells a raw xml response from a json one.
+    """
+    start = content.lstrip()[:1]
+    return start in (b'<', '<')
+
+def _xml_records(content):
+    """
+    Helper funcation that decodes a raw xml response incrementally.
+    Returns the response data type, read from the root element, and a
+    generator of its records: the attributes of each child element, or
+    its text for elements such as vintage_date that only hold a value.
+    Elements are discarded as soon as they are read.
+    """
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    events = iterparse(BytesIO(content), events=('start', 'end'))
+    _, root = next(events)
+    def records():
+        depth = 0
+        for event, element in events:
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth < 0:
+                break
+            if depth == 0:
+                record = dict(element.attrib)
+                text = (element.text or '').strip()
+                if text:
+                    ## release_date elements hold their date as text
+                    if record:
+                        record['date'] = text
+                    else:
+                        record = text
+                yield record
+                root.clear()
+    return root.tag, records()
+
+def _response_records(content):
+    """
+    Helper funcation that returns the data type and the list of records
+    of a raw json or xml response.
+    """
+    if _is_xml(content):
+        key, records = _xml_records(content)
+        return key, list(records)
+    response = loads(content)
+    key = [x for x in response.keys() if x in c.response_data][0]
+    return key, response[key]
 
 def _dict(content):
     """
     Helper funcation that converts text-based get response
     to a python dictionary for additional manipulation.
     """
-    if _has_pandas:
-        data = _data_frame(content).to_dict(orient='records')
-    else:
-        response = loads(content)
-        key = [x for x in response.keys() if x in c.response_data][0]
-        data = response[key]
+    key, records = _response_records(content)
+    if records and not isinstance(records[0], dict):
+        records = [{0: record} for record in records]
+    data = _typed_records(key, records)
     return data
 
+def _observation_columns(observations):
+    """
+    Helper funcation that decodes plain FRED observations straight to
+    typed columns: datetime64 dates and float64 values, with the "."
+    FRED reports for missing values mapped to NaN. Returns None for
+    other layouts, such as the wide output_type 2 and 3 responses.
+    """
+    if observations and set(observations[0]) != _observation_fields:
+        return None
+    from numpy import array, nan
+    columns = {}
+    for name in ('realtime_start','realtime_end','date'):
+        columns[name] = array([o[name] for o in observations],dtype='datetime64[D]')
+    values = array([o['value'] for o in observations],dtype=object)
+    values[values == '.'] = nan
+    columns['value'] = values.astype('float64')
+    return columns
+
 def _data_frame(content):
     """
     Helper funcation that converts text-based get response
     to a pandas dataframe for additional manipulation.
     """
-    response = loads(content)
-    key = [x for x in response.keys() if x in c.response_data][0]
-    frame = DataFrame(response[key])
-    final_frame = _convert(frame)
+    from pandas import DataFrame
+    key, records = _response_records(content)
+    if key == 'observations':
+        columns = _observation_columns(records)
+        if columns is not None:
+            return DataFrame(columns,columns=_observation_order)
+    frame = DataFrame(records)
+    final_frame = _convert(frame, key)
     return final_frame
 
+def _records(content):
+    """
+    Helper funcation that yields the records of a raw json or xml response
+    one at a time, decoding each as it is reached instead of the whole
+    response, as ``(key, record)`` with the response data type. Records
+    that are plain values, such as vintage dates, are yielded as
+    dictionaries keyed on the response data type.
+    """
+    if _is_xml(content):
+        key, records = _xml_records(content)
+        for record in records:
+            yield key, record if isinstance(record, dict) else {key: record}
+        return
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    def skip(pos):
+        return _whitespace.match(content, pos).end()
+    def expect(pos, token):
+        if content[pos:pos + 1] != token:
+            raise ValueError('Expected %r at position %d of json response' % (token, pos))
+        return skip(pos + 1)
+    pos = expect(skip(0), '{')
+    while content[pos:pos + 1] != '}':
+        name, pos = _decoder.raw_decode(content, pos)
+        pos = expect(skip(pos), ':')
+        if name in c.response_data and content[pos:pos + 1] == '[':
+            pos = skip(pos + 1)
+            while content[pos:pos + 1] != ']':
+                record, pos = _decoder.raw_decode(content, pos)
+                yield name, record if isinstance(record, dict) else {name: record}
+                pos = skip(pos)
+                if content[pos:pos + 1] == ',':
+                    pos = skip(pos + 1)
+            pos = skip(pos + 1)
+        else:
+            _, pos = _decoder.raw_decode(content, pos)
+            pos = skip(pos)
+        if content[pos:pos + 1] == ',':
+            pos = skip(pos + 1)
+
+class _Line(object):
+    """
+    File-like object whose write returns the line it is given, so a
+    csv writer can produce lines one at a time.
+    """
+    def write(self, line):
+        return line
+
+def _delimited(contents, sep=','):
+    """
+    Helper funcation that yields the records of one or more raw json
+    responses, such as the pages of a paginated request, as lines of
+    delimited values. Each response is decoded on its own. The header has
+    every field of the first response, in the order first seen, followed by
+    the other known fields of its data type in fred.config.fields, so
+    optional fields absent from the first records are kept. A later record
+    with a field outside the header raises ValueError rather than losing it.
+    Values are written as FRED reports them.
+    """
+    if isinstance(contents, (str, bytes) if version_info[0] >= 3 else basestring):
+        contents = [contents]
+    writer = None
+    for content in contents:
+        records = _records(content)
+        if writer is None:
+            records = list(records)
+            if not records:
+                continue
+            header = []
+            seen = set()
+            fields = [field for _, record in records for field in record]
+            for field in fields + list(c.fields.get(records[0][0], [])):
+                if field not in seen:
+                    seen.add(field)
+                    header.append(field)
+            writer = csv.DictWriter(_Line(),header,delimiter=sep,lineterminator='\n')
+            yield writer.writeheader()
+        for _, record in records:
+            yield writer.writerow(record)
+
 def _csv(content):
     """
     Helper funcation that converts text-based get response
     to comma separated values for additional manipulation.
     """
-    response = _data_frame(content).to_csv(index=False)
+    response = ''.join(_delimited(content))
     return response
 
 def _tab(content):
@@ -95,7 +413,7 @@ def _tab(content):
     Helper funcation that converts text-based get response
     to tab separated values for additional manipulation.
     """
-    response = _data_frame(content).to_csv(index=False,sep='\t')
+    response = ''.join(_delimited(content,sep='\t'))
     return response
 
 def _pipe(content):
@@ -103,7 +421,7 @@ def _pipe(content):
     Helper funcation that converts text-based get response
     to pipe separated values for additional manipulation.
     """
-    response = _data_frame(content).to_csv(index=False,sep='|')
+    response = ''.join(_delimited(content,sep='|'))
     return response
 
 def _numpy(content):
@@ -114,48 +432,205 @@ def _numpy(content):
     response = _data_frame(content).values
     return response
 
+def _observations_frame(series_ids,contents):
+    """
+    Helper funcation that aligns the json observations of several series
+    on their dates in a single outer join, one float64 column per series.
+    Missing values, reported by FRED as ".", become NaN.
+    """
+    from pandas import DataFrame, DatetimeIndex, Series, concat
+    columns = []
+    for series_id, content in zip(series_ids,contents):
+        observations = _observation_columns(loads(content)['observations'])
+        index = DatetimeIndex(observations['date'])
+        columns.append(Series(observations['value'],index=index,name=series_id))
+    if not columns:
+        return DataFrame()
+    frame = concat(columns,axis=1,join='outer',sort=True)
+    frame.index.name = 'date'
+    return frame
+
+def _vintage_panel(vintages,chunks,contents,fill=False):
+    """
+    Helper funcation that assembles wide output_type 2 or 3 observations
+    responses, one per chunk of vintage dates, into a dense float64 data
+    frame of observation dates by vintage dates. Missing values, reported
+    by FRED as ".", become NaN. With fill, values a vintage does not
+    report are carried forward from the previous vintage.
+    """
+    from numpy import arange, array, concatenate, full, isnan, maximum, nan, unique, where
+    from pandas import DataFrame, DatetimeIndex
+    blocks = []
+    for chunk, content in zip(chunks,contents):
+        observations = loads(content)['observations']
+        suffixes = [vintage.replace('-','') for vintage in chunk]
+        rows = []
+        for observation in observations:
+            ## Columns are named <series_id>_<YYYYMMDD> after their vintage
+            row = dict((name.rsplit('_',1)[-1], value) for name, value in observation.items() if name != 'date')
+            rows.append([row.get(suffix,'.') for suffix in suffixes])
+        values = array(rows,dtype=object).reshape(len(rows),len(chunk))
+        values[values == '.'] = nan
+        dates = array([observation['date'] for observation in observations],dtype='datetime64[D]')
+        blocks.append((dates, values.astype('float64')))
+    all_dates = unique(concatenate([dates for dates, _ in blocks])) if blocks else array([],dtype='datetime64[D]')
+    panel = full((len(all_dates),len(vintages)),nan)
+    start = 0
+    for (dates, values), chunk in zip(blocks,chunks):
+        panel[all_dates.searchsorted(dates),start:start + len(chunk)] = values
+        start += len(chunk)
+    if fill and panel.size:
+        filled = where(~isnan(panel),arange(panel.shape[1]),0)
+        maximum.accumulate(filled,axis=1,out=filled)
+        panel = panel[arange(panel.shape[0])[:,None],filled]
+    return DataFrame(panel,index=DatetimeIndex(all_dates,name='date'),
+                     columns=DatetimeIndex(array(vintages,dtype='datetime64[D]'),name='vintage'))
+
 def _json(content):
     """
     Pass response
     """
-    return content
+    return content.decode('utf-8')
 
 def _xml(content):
     """
     Pass response
     """
+    return content.decode('utf-8')
+
+def _raw(content):
+    """
+    Pass response bytes as received
+    """
     return content
 
 def _dispatch(response_type):
     if _has_pandas:
         dispatch = {'dict': _dict,'json': _json,
-                    'xml': _xml,'df':_data_frame,
+                    'xml': _xml,'raw': _raw,'df':_data_frame,
                     'csv':_csv,'numpy':_numpy,
                     'tab': _tab,'pipe': _pipe}
     else:
-        dispatch = {'dict': _dict,'json': _json,'xml': _xml, }
+        dispatch = {'dict': _dict,'json': _json,'xml': _xml,'raw': _raw,
+                    'csv':_csv,'tab': _tab,'pipe': _pipe}
 
     return dispatch[response_type]
 
 
-def _get_request(url_root,api_key,path,response_type,params, ssl_verify):
+def _get_request(url_root,api_key,path,response_type,params, ssl_verify, transport=None, validator=None, refresh=False):
     """
     Helper funcation that requests a get response from FRED.
+    Raw responses are served from and stored in the transport's cache.
+    When the cache revalidates, an expired entry is renewed without a
+    download if validator, called with the time the entry was last known
+    to be current, returns True. With refresh, the response is downloaded
+    whatever the cache holds and replaces the cached copy. Identical
+    requests made while one is in flight wait for it and share its
+    response, the same object. Requests are recorded by the transport's
+    instruments, if any.
     """
+    instruments = transport.instruments if transport else None
+    if instruments is None:
+        return _flight(_url_builder(url_root,api_key,path,params),path,response_type,ssl_verify,transport,validator,
+                       refresh=refresh)
+    started = time()
     url = _url_builder(url_root,api_key,path,params)
-    content = _fetch(url, ssl_verify)
+    record = instruments.start(path,params,response_type)
+    _timed(record, 'url', started)
+    try:
+        response = _flight(url,path,response_type,ssl_verify,transport,validator,record,refresh)
+    except Exception as e:
+        instruments.finish(record,e)
+        raise
+    ## Only the request that fetched a coalesced response converted it
+    if 'convert' not in record['stages']:
+        record['cache'] = 'coalesced'
+    instruments.finish(record)
+    return response
+
+def _flight(url,path,response_type,ssl_verify,transport=None,validator=None,record=None,refresh=False):
+    """
+    Helper funcation that makes a request, or waits for the identical
+    request in flight and shares its response.
+    """
+    flights = transport.flights if transport else None
+    request = lambda: _request(url,path,response_type,ssl_verify,transport,validator,record,refresh)
+    if flights is None:
+        return request()
+    return flights.do((_normalize_url(url), response_type, refresh), request)
+
+def _request(url,path,response_type,ssl_verify,transport=None,validator=None,record=None,refresh=False):
+    """
+    Helper funcation that serves a request from the cache or FRED
+    and converts it to response_type. With refresh, the cache is
+    only written.
+    """
+    cache = transport.cache if transport else None
+    content = None
+    if cache and refresh:
+        if record is not None:
+            record['cache'] = 'miss'
+    elif cache:
+        started = time()
+        entry = cache.get_entry(url)
+        if entry is not None:
+            expires, validated, cached = entry
+            now = time()
+            if expires >= now:
+                content = cached
+                status = 'hit'
+            elif validator is not None and cache.revalidate and validator(validated):
+                cache.set(url, cached, path, now)
+                content = cached
+                status = 'revalidated'
+        _timed(record, 'cache', started)
+        if record is not None:
+            record['cache'] = status if content is not None else 'miss'
+    if content is None:
+        fetched = time()
+        content = _fetch(url, ssl_verify, transport, record)
+        if cache:
+            cache.set(url, content, path, fetched)
+    started = time()
     response = _dispatch(response_type)(content)
+    _timed(record, 'convert', started)
     return response
 
-if _USE_JOBLIB_CACHE:
-    import joblib
-    one_gb = 1000000000
-    location = '/tmp/joblib_cache'
-    memory = joblib.Memory(location, verbose=1, bytes_limit=one_gb)
-    if _THROTTLE_REQUESTS:
-        from ratelimit import limits, sleep_and_retry
-        period_seconds = 1
-        calls_per_second = 20
-        _get_request = memory.cache(sleep_and_retry(limits(calls=calls_per_second, period=period_seconds)(_get_request)))
+def _page_count(content):
+    """
+    Helper funcation that reads the total number of results
+    and the page size from a raw xml or json response.
+    """
+    if _is_xml(content):
+        meta = fromstring(content).attrib
     else:
-        _get_request = memory.cache(_get_request)
+        meta = loads(content)
+    return int(meta.get('count', 0)), int(meta.get('limit', 0))
+
+def _iter_pages(url_root,api_key,path,response_type,params,ssl_verify,transport=None):
+    """
+    Helper funcation that walks an offset/limit endpoint page by page,
+    starting at params['offset'] with params['limit'] results per page.
+    The total is read from the first response and the next page is
+    fetched in the background while the current one is consumed. Each
+    page is yielded converted to response_type.
+    """
+    offset = int(params.get('offset', 0))
+    def fetch(offset):
+        page_params = dict(params)
+        page_params['offset'] = offset
+        return _get_request(url_root,api_key,path,'raw',page_params,ssl_verify,transport)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        content = fetch(offset)
+        count, limit = _page_count(content)
+        limit = int(params.get('limit', limit))
+        while True:
+            offset += limit
+            pending = executor.submit(fetch, offset) if limit and offset < count else None
+            yield _dispatch(response_type)(content)
+            if pending is None:
+                break
+            content = pending.result()
+    finally:
+        executor.shutdown(wait=False)
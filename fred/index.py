@@ -0,0 +1,223 @@
+from fred.helpers import loads, _timestamp
+from fred.utils import _atomic_write
+import fred.config as c
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from json import dump, load
+import time
+
+def _intersect(small,large):
+    """
+    Helper funcation that intersects two sorted postings by binary
+    searching each entry of the smaller one in the larger one.
+    """
+    result = array('l')
+    lo = 0
+    for number in small:
+        lo = bisect_left(large, number, lo)
+        if lo == len(large):
+            break
+        if large[lo] == number:
+            result.append(number)
+    return result
+
+def _difference(postings,excluded):
+    """
+    Helper funcation that removes the entries of one sorted posting from another.
+    """
+    result = array('l')
+    lo = 0
+    for number in postings:
+        lo = bisect_left(excluded, number, lo)
+        if lo == len(excluded) or excluded[lo] != number:
+            result.append(number)
+    return result
+
+class TagIndex(object):
+    """
+    Local inverted index from FRED tags to the series that carry them, for
+    answering tag queries without requests. Each series is numbered once and
+    each tag keeps a sorted array of the numbers of its series, so
+    intersections and exclusions are merges of sorted integer postings.
+
+    Assignments are harvested with ``series.tags`` (the tags of given series)
+    or ``tags.series`` (the series of given tags), and kept current with
+    ``refresh``, which harvests again the indexed series that changed
+    according to ``series.updates``.
+
+    ::
+
+        index = TagIndex(Fred(api_key='abcdefghijklmnopqrstuvwxyz123456'))
+        index.harvest_tags(['usa','gdp','quarterly','nsa'])
+        index.series(['gdp','quarterly'],exclude_tag_names=['nsa'])
+        index.related_tags(['gdp'])
+
+    :arg client: :class:`fred.Fred` instance used for requests.
+    """
+    def __init__(self,client=None):
+        self.client = client
+        self.series_ids = []
+        self.refreshed = None
+        self._numbers = {}
+        self._tags = []
+        self._postings = None
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def _number(self,series_id):
+        number = self._numbers.get(series_id)
+        if number is None:
+            number = self._numbers[series_id] = len(self.series_ids)
+            self.series_ids.append(series_id)
+            self._tags.append(set())
+        return number
+
+    def add(self,series_id,tag_names):
+        """
+        Set the tags of a series, replacing any it had in the index.
+        """
+        self._tags[self._number(series_id)] = set(tag_names)
+        self._postings = None
+
+    def harvest_series(self,series_ids,max_workers=None):
+        """
+        Request the tags of each series with ``series.tags``, concurrently
+        under the client's rate limit, and index them.
+
+        :arg list series_ids: The ids for the series. Required.
+        :arg int max_workers: Maximum number of requests in flight at once.
+        """
+        series_ids = list(series_ids)
+        max_workers = max_workers if max_workers else c.max_concurrency
+        fetch = lambda series_id: loads(self.client.series.tags(series_id,response_type='raw'))['tags']
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for series_id, tags in zip(series_ids,executor.map(fetch,series_ids)):
+                self.add(series_id,[tag['name'] for tag in tags])
+        return len(series_ids)
+
+    def harvest_tags(self,tag_names,max_workers=None):
+        """
+        Request every series of each tag with ``tags.series``, concurrently
+        under the client's rate limit, and add the tag to them.
+
+        :arg list tag_names: The names of the tags. Required.
+        :arg int max_workers: Maximum number of tags requested at once.
+        """
+        tag_names = list(tag_names)
+        max_workers = max_workers if max_workers else c.max_concurrency
+        def fetch(tag_name):
+            pages = self.client.tag.series(tag_name,response_type='raw',paginate=True,params={'limit': 1000})
+            return [series['id'] for page in pages for series in loads(page)['seriess']]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for tag_name, series_ids in zip(tag_names,executor.map(fetch,tag_names)):
+                for series_id in series_ids:
+                    self._tags[self._number(series_id)].add(tag_name)
+        self._postings = None
+        return len(tag_names)
+
+    def refresh(self,filter_value='all',max_workers=None,new_series=False):
+        """
+        Harvest again the tags of series that ``series.updates`` reports as
+        changed since the last refresh (FRED reports the last two weeks), and
+        return their ids. Only indexed series are refreshed, so the index
+        keeps a fixed universe of series. With new_series, updated series not
+        yet indexed are harvested too, at one ``series.tags`` request each;
+        the updates cover tens of thousands of series, so narrow them with
+        filter_value or harvest the tags again instead.
+
+        :arg str filter_value: Limit results by geographic type of economic data series. Options are 'macro',
+                                'regional', and 'all'
+        :arg int max_workers: Maximum number of requests in flight at once.
+        :arg bool new_series: Also harvest updated series that are not indexed yet.
+        """
+        started = time.time()
+        changed = []
+        pages = self.client.series.updates(response_type='raw',paginate=True,params={'filter_value': filter_value})
+        for page in pages:
+            for series in loads(page)['seriess']:
+                if series['id'] not in self._numbers:
+                    if new_series:
+                        changed.append(series['id'])
+                elif self.refreshed is None or _timestamp(series['last_updated']) > self.refreshed:
+                    changed.append(series['id'])
+        self.harvest_series(changed,max_workers)
+        self.refreshed = started
+        return changed
+
+    def postings(self,tag_name):
+        """
+        Return the sorted numbers of the series carrying a tag, indexes into ``series_ids``.
+        """
+        if self._postings is None:
+            postings = {}
+            for number, tags in enumerate(self._tags):
+                for name in tags:
+                    postings.setdefault(name, array('l')).append(number)
+            self._postings = postings
+        return self._postings.get(tag_name, array('l'))
+
+    def _match(self,tag_names,exclude_tag_names=None):
+        postings = sorted((self.postings(tag_name) for tag_name in tag_names), key=len)
+        if not postings:
+            return array('l')
+        matched = postings[0]
+        for posting in postings[1:]:
+            matched = _intersect(matched,posting)
+        for tag_name in exclude_tag_names or []:
+            matched = _difference(matched,self.postings(tag_name))
+        return matched
+
+    def series(self,tag_names,exclude_tag_names=None):
+        """
+        Return the ids of the series that carry all of tag_names and none of
+        exclude_tag_names, as ``tags.series`` would.
+
+        :arg list tag_names: Tag names the series must carry. Required.
+        :arg list exclude_tag_names: Tag names the series must not carry.
+        """
+        return sorted(self.series_ids[number] for number in self._match(tag_names,exclude_tag_names))
+
+    def related_tags(self,tag_names,exclude_tag_names=None):
+        """
+        Return, for every other tag carried by the matching series, how many
+        of them carry it, as the series_count of ``tags.related_tags``.
+
+        :arg list tag_names: Tag names the series must carry. Required.
+        :arg list exclude_tag_names: Tag names the series must not carry.
+        """
+        query = set(tag_names)
+        counts = {}
+        for number in self._match(tag_names,exclude_tag_names):
+            for tag_name in self._tags[number]:
+                if tag_name not in query:
+                    counts[tag_name] = counts.get(tag_name, 0) + 1
+        return counts
+
+    def tags(self,series_id):
+        """
+        Return the names of the tags of an indexed series.
+        """
+        return sorted(self._tags[self._numbers[series_id]])
+
+    def save(self,path):
+        """
+        Write the index to a file, replacing it atomically.
+        """
+        _atomic_write(path,lambda f: dump({'refreshed': self.refreshed,
+                                           'series': [[series_id, sorted(tags)] for series_id, tags
+                                                      in zip(self.series_ids,self._tags)]},f))
+
+    @classmethod
+    def load(cls,path,client=None):
+        """
+        Read an index from a file written by ``save``.
+        """
+        with open(path) as f:
+            saved = load(f)
+        index = cls(client)
+        for series_id, tags in saved['series']:
+            index.add(series_id,tags)
+        index.refreshed = saved['refreshed']
+        return index
@@ -0,0 +1,210 @@
+from email.utils import parsedate_tz, mktime_tz
+import math
+import os
+import struct
+import threading
+import time
+
+import fred.config as c
+
+class RateLimiter(object):
+    """
+    Base class for client-side rate limits. Every request made through a
+    :class:`fred.transport.Transport` first calls ``acquire``, which blocks
+    until the request may be sent. When FRED answers 429 Too Many Requests,
+    ``penalize`` is called with the delay it asked for, and every request
+    sharing the limiter waits it out.
+
+    Subclasses implement ``acquire`` and ``penalize``. Any object with the
+    same two methods can be given to :class:`fred.Fred` as ``rate_limiter``.
+
+    By default requests are spaced evenly, at least ``1 / calls_per_second``
+    seconds apart, so no one second window holds more than calls_per_second
+    requests. A burst above 1 lets requests go back to back after a quiet
+    period, and a window can then hold up to ``burst - 1`` more.
+
+    :arg float calls_per_second: Requests per second allowed.
+    :arg int burst: Requests that may be sent back to back after a quiet period. Defaults to 1.
+    """
+    def __init__(self,calls_per_second=c.calls_per_second,burst=None):
+        self.calls_per_second = float(calls_per_second)
+        self.burst = int(burst) if burst else 1
+
+    def acquire(self):
+        raise NotImplementedError
+
+    def penalize(self,seconds):
+        raise NotImplementedError
+
+    def _reserve(self,now,tat,paused):
+        """
+        Try to reserve a request slot at the current time, given the
+        theoretical arrival time of the last reservation and the end of any
+        pause. Returns ``(wait, tat)``: 0 and the new theoretical arrival
+        time when the request may be sent now, or the seconds to wait before
+        trying again and the unchanged tat. Slots are only taken when a
+        request is actually sent, so a sleep that overruns never brings two
+        requests closer together than allowed.
+        """
+        interval = 1.0 / self.calls_per_second
+        start = max(paused, tat - (self.burst - 1) * interval)
+        if start > now:
+            return start - now, tat
+        return 0.0, max(tat, now) + interval
+
+class ThreadLimiter(RateLimiter):
+    """
+    Rate limit shared by the threads of one process.
+    """
+    def __init__(self,calls_per_second=c.calls_per_second,burst=None):
+        super(ThreadLimiter, self).__init__(calls_per_second,burst)
+        self._tat = 0.0
+        self._paused = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                wait, self._tat = self._reserve(time.time(),self._tat,self._paused)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def penalize(self,seconds):
+        with self._lock:
+            self._paused = max(self._paused, time.time() + seconds)
+
+class FileLimiter(RateLimiter):
+    """
+    Rate limit shared by every process on a host through a small state file,
+    updated under an exclusive ``flock``. Processes only hold the lock while
+    reserving their slot, never while waiting for it. Requires a POSIX system.
+
+    :arg str path: State file shared by the processes, e.g. ``'/tmp/fred.limit'``.
+    """
+    _state = struct.Struct('>dd')
+
+    def __init__(self,path=c.rate_limit_location,calls_per_second=c.calls_per_second,burst=None):
+        import fcntl
+        super(FileLimiter, self).__init__(calls_per_second,burst)
+        self.path = path
+        self._flock = fcntl.flock
+        self._exclusive = fcntl.LOCK_EX
+        self._unlock = fcntl.LOCK_UN
+        self._local = threading.Lock()
+
+    def _update(self,update):
+        """
+        Apply update to the shared ``(tat, paused)`` state under the file lock
+        and return its result.
+        """
+        with self._local:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._flock(fd, self._exclusive)
+                data = os.read(fd, self._state.size)
+                tat, paused = self._state.unpack(data) if len(data) == self._state.size else (0.0, 0.0)
+                result, tat, paused = update(time.time(), tat, paused)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, self._state.pack(tat, paused))
+                self._flock(fd, self._unlock)
+            finally:
+                os.close(fd)
+        return result
+
+    def acquire(self):
+        def reserve(now, tat, paused):
+            wait, tat = self._reserve(now,tat,paused)
+            return wait, tat, paused
+        while True:
+            wait = self._update(reserve)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def penalize(self,seconds):
+        self._update(lambda now, tat, paused: (None, tat, max(paused, now + seconds)))
+
+class RedisLimiter(RateLimiter):
+    """
+    Rate limit shared through a Redis-compatible server, so processes on
+    several hosts can share an API key. Time is cut into slots and one
+    request is allowed per slot, claimed with ``INCR`` on the slot's key
+    (which ``EXPIRE`` removes shortly after). Slots last
+    ``1 / (calls_per_second - 1)`` seconds, so that any one second window,
+    which can overlap one more slot than it contains, holds at most
+    calls_per_second requests. Pauses are kept under a separate key, so any
+    client exposing ``incr``, ``expire``, ``get`` and ``set`` works,
+    including in-process stand-ins.
+
+    :arg client: Redis client, e.g. ``redis.Redis()``.
+    :arg str key: Prefix of the keys used by the limiter; use one per API key.
+    """
+    def __init__(self,client,key='fred:limit',calls_per_second=c.calls_per_second):
+        super(RedisLimiter, self).__init__(calls_per_second)
+        self.client = client
+        self.key = key
+        ## Slots per second; below 2 calls per second, slots of twice the interval
+        self.slots = self.calls_per_second - 1 if self.calls_per_second >= 2 else self.calls_per_second / 2.0
+
+    def acquire(self):
+        while True:
+            now = time.time()
+            paused = self.client.get('%s:paused' % self.key)
+            if paused is not None and float(paused) > now:
+                time.sleep(float(paused) - now)
+                continue
+            slot = int(now * self.slots)
+            window = '%s:%d' % (self.key, slot)
+            count = self.client.incr(window)
+            if count == 1:
+                self.client.expire(window, int(math.ceil(1 / self.slots)) + 1)
+                return
+            time.sleep(max(0.0, float(slot + 1) / self.slots - now))
+
+    def penalize(self,seconds):
+        until = time.time() + seconds
+        paused = self.client.get('%s:paused' % self.key)
+        if paused is None or float(paused) < until:
+            self.client.set('%s:paused' % self.key, repr(until))
+            self.client.expire('%s:paused' % self.key, int(math.ceil(seconds)) + 1)
+
+def _retry_after(headers,default=c.rate_limit_pause):
+    """
+    Helper funcation that reads the seconds to wait from the Retry-After
+    header of a 429 response, given in seconds or as an HTTP date.
+    """
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return default
+        return max(0.0, mktime_tz(parsed) - time.time())
+
+## One in-process limiter per rate, shared by every client in the process
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _rate_limiter(rate_limiter=True,calls_per_second=c.calls_per_second):
+    """
+    Helper funcation that resolves the rate limit settings of a client: a
+    :class:`RateLimiter` (or any object with ``acquire`` and ``penalize``)
+    is used as is, a path builds a :class:`FileLimiter` shared with other
+    processes, a false value disables the rate limit, and a true value uses
+    the :class:`ThreadLimiter` shared by the clients of this process.
+    """
+    if hasattr(rate_limiter, 'acquire'):
+        return rate_limiter
+    if not rate_limiter:
+        return None
+    if isinstance(rate_limiter, str):
+        return FileLimiter(rate_limiter,calls_per_second)
+    with _limiters_lock:
+        limiter = _limiters.get(calls_per_second)
+        if limiter is None:
+            limiter = _limiters[calls_per_second] = ThreadLimiter(calls_per_second)
+    return limiter
@@ -0,0 +1,212 @@
+from sys import version_info
+if version_info[0] >= 3:
+    from urllib.error import HTTPError
+else:
+    from urllib2 import HTTPError
+
+from bisect import bisect_left
+import threading
+import time
+
+import fred.config as c
+
+## Counters kept per endpoint path, with their help text for the Prometheus exporter
+_counters = [
+            ('requests', 'Requests made.'),
+            ('errors', 'Requests that raised an error.'),
+            ('cache_hits', 'Requests served from the response cache.'),
+            ('cache_misses', 'Requests fetched from FRED.'),
+            ('cache_revalidations', 'Expired cache entries renewed without a download.'),
+            ('coalesced', 'Requests that shared the response of an identical request in flight.'),
+            ('bytes', 'Response bytes fetched from FRED, after decompression.'),
+            ('retries', 'Requests sent again after a failure.'),
+            ('rate_limit_seconds', 'Seconds spent waiting for the rate limiter.')
+            ]
+
+class Instruments(object):
+    """
+    Instrumentation of the requests made through a :class:`fred.Fred`
+    client. Each request is timed by stage and counted by endpoint path:
+
+    * ``url``: building the request url
+    * ``cache``: looking the response up in the cache
+    * ``rate_limit``: waiting for the rate limiter
+    * ``network``: sending the request and reading the response
+    * ``retry_wait``: backing off before retries
+    * ``convert``: decoding and converting the response to its response type
+    * ``total``: the whole request
+
+    Stage times go to per path histograms with the bucket bounds of
+    ``buckets``, and bytes, retries, cache hits and misses and rate limit
+    waits to per path counters. ``snapshot`` returns them as a dictionary
+    and ``prometheus`` in the Prometheus text exposition format.
+
+    Hooks registered with ``before_request`` are called with the record of
+    each request before it is made, and hooks registered with
+    ``after_request`` with the completed record: its ``path``, ``params``
+    (without the API key), ``response_type``, ``cache`` ('hit', 'miss',
+    'revalidated', 'coalesced' or None without a cache), ``status``,
+    ``bytes``, ``retries``, ``stages`` (seconds by stage), ``seconds`` and
+    ``error``. Hooks run on the thread making the request.
+
+    ::
+
+        fr = Fred(api_key='abcdefghijklmnopqrstuvwxyz123456',instruments=True)
+        fr.instruments.after_request(lambda record: log.info('%(path)s %(seconds).3f', record))
+        fr.series.observations('GDP')
+        print(fr.instruments.prometheus())
+
+    :arg buckets: Upper bounds in seconds of the histogram buckets.
+    """
+    def __init__(self,buckets=c.metrics_buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._before = []
+        self._after = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def before_request(self,hook):
+        """
+        Register a hook called with the record of each request before it is made.
+        """
+        self._before.append(hook)
+        return hook
+
+    def after_request(self,hook):
+        """
+        Register a hook called with the record of each request once it completed or failed.
+        """
+        self._after.append(hook)
+        return hook
+
+    def start(self,path,params,response_type):
+        """
+        Begin the record of a request and run the before_request hooks.
+        """
+        record = {'path': path.rstrip('?'),
+                  'params': dict((k, v) for k, v in params.items() if k != 'api_key' and v is not None),
+                  'response_type': response_type,'cache': None,'status': None,'bytes': 0,'retries': 0,
+                  'stages': {},'seconds': None,'error': None,'started': time.time()}
+        for hook in self._before:
+            hook(record)
+        return record
+
+    def finish(self,record,error=None):
+        """
+        Complete the record of a request, add it to the metrics and run the
+        after_request hooks.
+        """
+        record['seconds'] = time.time() - record['started']
+        record['stages']['total'] = record['seconds']
+        if error is not None:
+            record['error'] = error
+            if isinstance(error, HTTPError):
+                record['status'] = error.code
+        elif record['status'] is None and record['cache'] in (None, 'miss'):
+            record['status'] = 200
+        path = record['path']
+        with self._lock:
+            self._add('requests', path, 1)
+            self._add('bytes', path, record['bytes'])
+            self._add('retries', path, record['retries'])
+            self._add('rate_limit_seconds', path, record['stages'].get('rate_limit', 0.0))
+            if error is not None:
+                self._add('errors', path, 1)
+            if record['cache'] == 'hit':
+                self._add('cache_hits', path, 1)
+            elif record['cache'] == 'miss':
+                self._add('cache_misses', path, 1)
+            elif record['cache'] == 'revalidated':
+                self._add('cache_revalidations', path, 1)
+            elif record['cache'] == 'coalesced':
+                self._add('coalesced', path, 1)
+            for stage, seconds in record['stages'].items():
+                histogram = self._histograms.get((stage, path))
+                if histogram is None:
+                    histogram = self._histograms[(stage, path)] = [[0] * (len(self.buckets) + 1), 0.0]
+                histogram[0][bisect_left(self.buckets, seconds)] += 1
+                histogram[1] += seconds
+        for hook in self._after:
+            hook(record)
+        return record
+
+    def _add(self,name,path,value):
+        counter = self._counters[name]
+        counter[path] = counter.get(path, 0) + value
+
+    def snapshot(self):
+        """
+        Return the metrics as a dictionary: ``counters`` by name and path,
+        and ``histograms`` by stage and path, each with the ``count`` and
+        ``sum`` of its observations and the cumulative count of each bucket
+        bound in ``buckets``.
+        """
+        with self._lock:
+            counters = dict((name, dict(values)) for name, values in self._counters.items())
+            histograms = {}
+            for (stage, path), (counts, total) in self._histograms.items():
+                cumulative = []
+                running = 0
+                for count in counts[:-1]:
+                    running += count
+                    cumulative.append(running)
+                histograms.setdefault(stage, {})[path] = {'count': running + counts[-1],'sum': total,
+                                                          'buckets': dict(zip(self.buckets, cumulative))}
+        return {'counters': counters,'histograms': histograms}
+
+    def prometheus(self,prefix='fred'):
+        """
+        Return the metrics in the Prometheus text exposition format, as the
+        counters ``<prefix>_<name>_total`` and the histogram
+        ``<prefix>_stage_seconds``, labelled with the endpoint path and stage.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, help_text in _counters:
+            metric = '%s_%s_total' % (prefix, name)
+            lines.append('# HELP %s %s' % (metric, help_text))
+            lines.append('# TYPE %s counter' % metric)
+            for path, value in sorted(snapshot['counters'][name].items()):
+                lines.append('%s{path="%s"} %s' % (metric, path, _number(value)))
+        metric = '%s_stage_seconds' % prefix
+        lines.append('# HELP %s Seconds spent in each stage of a request.' % metric)
+        lines.append('# TYPE %s histogram' % metric)
+        for stage, paths in sorted(snapshot['histograms'].items()):
+            for path, histogram in sorted(paths.items()):
+                labels = 'path="%s",stage="%s"' % (path, stage)
+                for bound in self.buckets:
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (metric, labels, _number(bound), histogram['buckets'][bound]))
+                lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, labels, histogram['count']))
+                lines.append('%s_sum{%s} %s' % (metric, labels, _number(histogram['sum'])))
+                lines.append('%s_count{%s} %d' % (metric, labels, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Reset the counters and histograms. Hooks are kept.
+        """
+        with self._lock:
+            self._counters = dict((name, {}) for name, _ in _counters)
+            self._histograms = {}
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _timed(record,stage,started):
+    """
+    Helper funcation that adds the seconds since started to a stage of a
+    request record, if the request is instrumented.
+    """
+    if record is not None:
+        stages = record['stages']
+        stages[stage] = stages.get(stage, 0.0) + time.time() - started
+
+def _instruments(instruments=c.instruments):
+    """
+    Helper funcation that resolves the instrumentation setting of a client:
+    an :class:`Instruments` instance is used as is, a true value builds one
+    and a false value disables instrumentation.
+    """
+    if isinstance(instruments, Instruments):
+        return instruments
+    return Instruments() if instruments else None
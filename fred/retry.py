@@ -0,0 +1,103 @@
+from sys import version_info
+if version_info[0] >= 3:
+    from urllib.error import HTTPError, URLError
+else:
+    from urllib2 import HTTPError, URLError
+
+import random
+import threading
+
+import fred.config as c
+
+class RetryPolicy(object):
+    """
+    Retries failed requests with capped exponential backoff and full jitter:
+    the n-th retry waits a random time between 0 and
+    ``min(max_backoff, backoff * 2 ** n)`` seconds. Rate limit (429) and
+    server error responses are retried, and so are connection errors.
+    A 429 waits at least its Retry-After delay.
+
+    Counters of the requests sent, retries and time spent waiting are kept
+    for tuning and returned by ``metrics``.
+
+    :arg int retries: Maximum number of times a request is sent again.
+    :arg float backoff: Base delay in seconds of the first retry.
+    :arg float max_backoff: Cap on the delay of any single retry.
+    :arg bool jitter: Randomize delays so clients that failed together do not retry together.
+    :arg statuses: HTTP statuses that are retried.
+    """
+    def __init__(self,retries=c.retries,backoff=c.retry_backoff,max_backoff=c.retry_max_backoff,jitter=True,
+                 statuses=c.retry_statuses):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def retryable(self,error):
+        """
+        Whether a failed request should be sent again, given the ``HTTPError``
+        or ``URLError`` it raised.
+        """
+        if isinstance(error, HTTPError):
+            return error.code in self.statuses
+        return isinstance(error, URLError)
+
+    def delay(self,attempt):
+        """
+        Return the seconds to wait before retry number attempt, counted from 0.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def record(self,event,reason=None,seconds=0.0):
+        """
+        Count a request event: 'request' for each request sent, 'retry' with
+        its reason and wait, or 'failure' when a request is given up.
+        """
+        with self._lock:
+            if event == 'request':
+                self._metrics['requests'] += 1
+            elif event == 'retry':
+                self._metrics['retries'] += 1
+                self._metrics['retry_seconds'] += seconds
+                reasons = self._metrics['retries_by_reason']
+                reasons[reason] = reasons.get(reason, 0) + 1
+            elif event == 'failure':
+                self._metrics['failures'] += 1
+
+    def metrics(self):
+        """
+        Return a snapshot of the counters: requests sent, retries, seconds
+        spent waiting to retry, requests given up, and retries by reason
+        (an HTTP status, or 'connection').
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['retries_by_reason'] = dict(self._metrics['retries_by_reason'])
+        return metrics
+
+    def reset(self):
+        """
+        Reset the counters.
+        """
+        with self._lock:
+            self._metrics = {'requests': 0,'retries': 0,'retry_seconds': 0.0,'failures': 0,
+                             'retries_by_reason': {}}
+
+def _retry_policy(retry=c.retry):
+    """
+    Helper funcation that resolves the retry setting of a client: a
+    :class:`RetryPolicy` is used as is, a number builds one with that many
+    retries, a true value builds one from fred.config and a false value
+    disables retries.
+    """
+    if isinstance(retry, RetryPolicy):
+        return retry
+    if retry is True:
+        return RetryPolicy()
+    if not retry:
+        return None
+    return RetryPolicy(retries=int(retry))
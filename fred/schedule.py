@@ -0,0 +1,118 @@
+from fred.helpers import loads
+import fred.config as c
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import threading
+
+class ReleaseScheduler(object):
+    """
+    Refreshes watched series when their release publishes, instead of the
+    whole universe on a timer. Each watched series is mapped once to its
+    release with ``series.release``. Every poll then reads the day's release
+    calendar with ``releases.dates``, and for the watched series of releases
+    scheduled that day asks ``series.vintage_dates`` whether a vintage dated
+    that day exists yet. Series whose release has published are refreshed
+    once, and the rest are asked again at the next poll. The vintage checks
+    bypass the client's response cache, so a release is noticed within a
+    poll_interval of publishing.
+
+    ::
+
+        scheduler = ReleaseScheduler(Fred(api_key='abcdefghijklmnopqrstuvwxyz123456'),
+                                     ['GDP','CPIAUCSL','UNRATE'],refresh=sync.sync)
+        scheduler.run()
+
+    :arg client: :class:`fred.Fred` instance used for requests.
+    :arg list series_ids: The ids for the watched series. Required.
+    :arg refresh: Called with the id of each series whose release published. Defaults to
+                  downloading its observations past the cache and replacing the cached copy,
+                  and the stored one when the client has an observation store.
+    :arg float poll_interval: Seconds between polls of the release calendar.
+    :arg int max_workers: Maximum number of requests in flight at once.
+    """
+    def __init__(self,client,series_ids,refresh=None,poll_interval=c.release_poll_interval,max_workers=None):
+        self.client = client
+        self.series_ids = list(series_ids)
+        self.refresh = refresh if refresh else self._observations
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers if max_workers else c.max_concurrency
+        self.releases = None
+        self._day = None
+        self._refreshed = set()
+
+    def _observations(self,series_id):
+        """
+        Download the observations of a series, bypassing the response cache,
+        and put them in place of the copies cached or stored before the
+        release, so later ``series.observations`` calls see the new data.
+        Returns the raw json response.
+        """
+        series = self.client.series
+        content = series._fresh('/series/observations?',{'series_id': series_id})
+        if series.store is not None:
+            series.store.write_content(series_id,content)
+        return content
+
+    def _map(self,fn,items):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fn,items))
+
+    def map_releases(self):
+        """
+        Request the release of each watched series and return the watched
+        series ids by release id.
+        """
+        release_id = lambda series_id: loads(self.client.series.release(series_id,response_type='raw'))['releases'][0]['id']
+        releases = {}
+        for series_id, release in zip(self.series_ids,self._map(release_id,self.series_ids)):
+            releases.setdefault(int(release), []).append(series_id)
+        self.releases = releases
+        return releases
+
+    def scheduled(self,day=None):
+        """
+        Return the ids of the releases of watched series scheduled on a day.
+
+        :arg str day: Format "YYYY-MM-DD". Defaults to today.
+        """
+        day = day if day else date.today().isoformat()
+        if self.releases is None:
+            self.map_releases()
+        pages = self.client.release.all_dates(response_type='raw',paginate=True,
+                                              params={'realtime_start': day,'realtime_end': day,'limit': 1000,
+                                                      'include_release_dates_with_no_data': 'true'})
+        scheduled = set()
+        for page in pages:
+            for release_date in loads(page)['release_dates']:
+                if release_date['date'] == day and int(release_date['release_id']) in self.releases:
+                    scheduled.add(int(release_date['release_id']))
+        return sorted(scheduled)
+
+    def poll(self,day=None):
+        """
+        Refresh the watched series whose release published on a day and that
+        were not refreshed yet, and return their ids.
+
+        :arg str day: Format "YYYY-MM-DD". Defaults to today.
+        """
+        day = day if day else date.today().isoformat()
+        if day != self._day:
+            self._day = day
+            self._refreshed = set()
+        pending = [series_id for release_id in self.scheduled(day) for series_id in self.releases[release_id]
+                   if series_id not in self._refreshed]
+        published = lambda series_id: day in loads(self.client.series._fresh('/series/vintagedates?',
+                                                                             {'series_id': series_id,'realtime_start': day}))['vintage_dates']
+        refreshed = [series_id for series_id, new in zip(pending,self._map(published,pending)) if new]
+        self._map(self.refresh,refreshed)
+        self._refreshed.update(refreshed)
+        return refreshed
+
+    def run(self,stop=None):
+        """
+        Poll every poll_interval seconds until stop, a ``threading.Event``, is set.
+        """
+        stop = stop if stop is not None else threading.Event()
+        while not stop.is_set():
+            self.poll()
+            stop.wait(self.poll_interval)
@@ -0,0 +1,208 @@
+from pandas import DataFrame, DatetimeIndex, Series
+import numpy as np
+import fred.config as c
+from fred.helpers import _observation_columns, loads
+from fred.utils import _atomic_write
+from json import dump, load
+import os
+import shutil
+import tempfile
+import time
+
+class ObservationStore(object):
+    """
+    Columnar on-disk store of series observations. Each series is kept in its
+    own directory as one NumPy file per column: ``date`` (datetime64[D]),
+    ``value`` (float64, NaN where FRED reports "."), and, when known,
+    ``realtime_start`` and ``realtime_end`` (datetime64[D]). Columns are
+    memory-mapped on read, so loading a stored series parses nothing and
+    copies nothing until the data is used.
+
+    Each write puts its columns in a new version sub-directory and then
+    atomically replaces the series' ``meta.json``, which names the current
+    version, so readers always see the columns of a single write.
+
+    Give a store to :class:`fred.Fred` to use it as a read-through backend for
+    ``series.observations``, or to :class:`fred.sync.ObservationSync` to keep
+    it up to date incrementally.
+
+    :arg str location: Directory holding one sub-directory per series.
+    :arg float max_age: Seconds a stored series is served before ``series.observations``
+                        downloads it again. None serves it until it is rewritten.
+    """
+    date_columns = ('realtime_start','realtime_end','date')
+
+    def __init__(self,location=c.store_location,max_age=c.store_max_age):
+        self.location = location
+        self.max_age = max_age
+        if not os.path.isdir(location):
+            os.makedirs(location)
+
+    def _dir(self,series_id):
+        return os.path.join(self.location,str(series_id))
+
+    def series_ids(self):
+        """
+        Return the ids of all stored series.
+        """
+        return sorted(name for name in os.listdir(self.location)
+                      if os.path.isfile(os.path.join(self.location,name,'meta.json')))
+
+    def meta(self,series_id):
+        """
+        Return the metadata of a stored series, or an empty dictionary if it is not stored.
+        """
+        try:
+            with open(os.path.join(self._dir(series_id),'meta.json')) as f:
+                return load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def fresh(self,series_id):
+        """
+        Whether a series is stored and younger than max_age.
+        """
+        stored = self.meta(series_id).get('stored')
+        if stored is None:
+            return False
+        return self.max_age is None or time.time() - stored <= self.max_age
+
+    def arrays(self,series_id,observation_start=None,observation_end=None):
+        """
+        Return the stored columns of a series as a dictionary of read-only
+        memory-mapped arrays, optionally restricted to an observation period,
+        or None if the series is not stored.
+
+        :arg str observation_start: The start of the observation period. Format "YYYY-MM-DD"
+        :arg str observation_end: The end of the observation period. Format "YYYY-MM-DD"
+        """
+        ## A writer may remove the version just read; read the new one then
+        for attempt in range(3):
+            meta = self.meta(series_id)
+            if not meta:
+                return None
+            path = os.path.join(self._dir(series_id),meta.get('version',''))
+            try:
+                arrays = dict((name, np.load(os.path.join(path,'%s.npy' % name),mmap_mode='r'))
+                              for name in meta['columns'])
+                break
+            except (IOError, OSError):
+                if attempt == 2:
+                    raise
+        dates = arrays['date']
+        lo = np.searchsorted(dates,np.datetime64(observation_start,'D')) if observation_start else 0
+        hi = np.searchsorted(dates,np.datetime64(observation_end,'D'),side='right') if observation_end else len(dates)
+        return dict((name, array[lo:hi]) for name, array in arrays.items())
+
+    def frame(self,series_id,observation_start=None,observation_end=None):
+        """
+        Return a stored series as a data frame with the columns of a
+        ``series.observations`` response, or None if it is not stored.
+
+        :arg str observation_start: The start of the observation period. Format "YYYY-MM-DD"
+        :arg str observation_end: The end of the observation period. Format "YYYY-MM-DD"
+        """
+        arrays = self.arrays(series_id,observation_start,observation_end)
+        if arrays is None:
+            return None
+        columns = [name for name in ('realtime_start','realtime_end','date','value') if name in arrays]
+        return DataFrame(dict((name, arrays[name]) for name in columns),columns=columns)
+
+    def records(self,series_id,observation_start=None,observation_end=None):
+        """
+        Return a stored series as a list of dictionaries with the fields and
+        types of a ``dict`` ``series.observations`` response (``datetime``
+        dates and float values), or None if it is not stored.
+
+        :arg str observation_start: The start of the observation period. Format "YYYY-MM-DD"
+        :arg str observation_end: The end of the observation period. Format "YYYY-MM-DD"
+        """
+        arrays = self.arrays(series_id,observation_start,observation_end)
+        if arrays is None:
+            return None
+        columns = [name for name in ('realtime_start','realtime_end','date','value') if name in arrays]
+        values = [arrays[name].astype('datetime64[us]').tolist() if name in self.date_columns else arrays[name].tolist()
+                  for name in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    def read(self,series_id):
+        """
+        Return ``(values, meta)`` for a series, where values are date-indexed
+        float64 observations, or ``(None, {})`` if it is not stored.
+        """
+        arrays = self.arrays(series_id)
+        if arrays is None:
+            return None, {}
+        values = Series(arrays['value'],index=DatetimeIndex(arrays['date']),name=series_id)
+        return values, self.meta(series_id)
+
+    def write(self,series_id,values,meta=None):
+        """
+        Store the observations of a series, replacing any stored copy.
+
+        :arg str series_id: The id for a series. Required.
+        :arg values: Date-indexed values, or a data frame with a ``date`` and a ``value``
+                     column and optionally ``realtime_start`` and ``realtime_end``.
+        :arg dict meta: Additional metadata kept with the series.
+        """
+        if isinstance(values, Series):
+            columns = {'date': values.index.values, 'value': values.values}
+        else:
+            columns = dict((name, values[name].values) for name in values.columns
+                           if name in self.date_columns or name == 'value')
+        self.write_arrays(series_id,columns,meta)
+
+    def write_arrays(self,series_id,columns,meta=None):
+        """
+        Store the observations of a series from a dictionary of column arrays,
+        replacing any stored copy.
+        """
+        path = self._dir(series_id)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        previous = self.meta(series_id).get('version')
+        version = tempfile.mkdtemp(dir=path,prefix='v')
+        try:
+            for name, array in columns.items():
+                dtype = 'datetime64[D]' if name in self.date_columns else 'float64'
+                np.save(os.path.join(version,'%s.npy' % name),np.asarray(array).astype(dtype))
+            meta = dict(meta if meta else {},columns=sorted(columns),stored=time.time(),
+                        version=os.path.basename(version))
+            _atomic_write(os.path.join(path,'meta.json'),lambda f: dump(meta,f),prefix='.tmp-',suffix='')
+        except BaseException:
+            shutil.rmtree(version,ignore_errors=True)
+            raise
+        ## Keep the version just replaced for readers still opening it; drop older ones
+        keep = set(['meta.json', meta['version'], previous])
+        for name in os.listdir(path):
+            if name not in keep and not name.startswith('.tmp-'):
+                stale = os.path.join(path,name)
+                if os.path.isdir(stale):
+                    shutil.rmtree(stale,ignore_errors=True)
+                else:
+                    os.remove(stale)
+
+    def write_content(self,series_id,content,meta=None):
+        """
+        Store the observations of a series from a raw json ``series.observations`` response, as bytes or text.
+        """
+        columns = _observation_columns(loads(content)['observations'])
+        self.write_arrays(series_id,columns,meta)
+
+    def delete(self,series_id):
+        """
+        Remove a series from the store.
+        """
+        shutil.rmtree(self._dir(series_id),ignore_errors=True)
+
+def _observation_store(store=c.store):
+    """
+    Helper funcation that resolves the store setting of a client: an
+    :class:`ObservationStore` is used as is, a directory builds one there,
+    and a false value disables the store.
+    """
+    if isinstance(store, ObservationStore):
+        return store
+    if not store:
+        return None
+    return ObservationStore(store)
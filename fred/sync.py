@@ -0,0 +1,104 @@
+from fred.helpers import _observations_frame, loads
+import fred.config as c
+from datetime import timedelta
+from pandas import concat
+
+class MemoryObservationStore(object):
+    """
+    In-process store of synchronized observations. Any object with the same
+    ``read`` and ``write`` methods can be given to :class:`ObservationSync`.
+    """
+    def __init__(self):
+        self._series = {}
+
+    def read(self,series_id):
+        """
+        Return ``(values, meta)`` for a series, or ``(None, {})`` if it is not stored.
+        """
+        return self._series.get(series_id, (None, {}))
+
+    def write(self,series_id,values,meta):
+        """
+        Store the date-indexed float64 values of a series with its sync metadata.
+        """
+        self._series[series_id] = (values, dict(meta))
+
+class ObservationSync(object):
+    """
+    Keeps local copies of series observations up to date with as little
+    transfer as possible. For each series the store remembers the last
+    observation date (``observation_end``) and the vintage the copy reflects
+    (``realtime_start``). A sync first asks ``series.vintage_dates`` whether a
+    newer vintage exists. When none does, nothing else is requested. When one
+    does, only observations from the end of the stored copy are requested
+    and merged in. Both requests bypass the client's response cache, so a
+    sync always sees the latest vintage, and replace the cached copies.
+
+    FRED cannot return only the points a vintage revised, so the last
+    ``lookback`` stored observations are requested again with the new points
+    and replace the stored values. Set lookback to None to download the full
+    history again whenever a new vintage appears.
+
+    ::
+
+        sync = ObservationSync(Fred(api_key='abcdefghijklmnopqrstuvwxyz123456'))
+        gdp = sync.sync('GDP')
+
+    :arg client: :class:`fred.Fred` instance used for requests.
+    :arg store: Store for observations and sync state. Defaults to a :class:`MemoryObservationStore`.
+    :arg int lookback: Trailing stored observations requested again when a new vintage is released.
+    """
+    def __init__(self,client,store=None,lookback=c.sync_lookback):
+        self.client = client
+        self.store = store if store is not None else MemoryObservationStore()
+        self.lookback = lookback
+
+    def latest_vintage(self,series_id,since=None):
+        """
+        Return the most recent vintage date of a series, on or after since if given.
+        """
+        params = {'series_id': series_id,'sort_order': 'desc','limit': 1}
+        if since:
+            params['realtime_start'] = since
+        content = self.client.series._fresh('/series/vintagedates?',params)
+        vintages = loads(content)['vintage_dates']
+        return vintages[0] if vintages else None
+
+    def sync(self,series_id):
+        """
+        Bring the stored copy of a series up to date and return its date-indexed
+        float64 values.
+
+        :arg str series_id: The id for a series. Required.
+        """
+        values, meta = self.store.read(series_id)
+        vintage = self.latest_vintage(series_id,meta.get('realtime_start'))
+        if values is not None and vintage is not None and vintage == meta.get('realtime_start'):
+            return values
+        params = {'series_id': series_id}
+        if values is not None and len(values) and self.lookback is not None:
+            if self.lookback:
+                start = values.index[max(len(values) - self.lookback, 0)]
+            else:
+                start = values.index[-1] + timedelta(days=1)
+            params['observation_start'] = start.strftime('%Y-%m-%d')
+            values = values[values.index < start]
+        else:
+            values = None
+        content = self.client.series._fresh('/series/observations?',params)
+        update = _observations_frame([series_id],[content])[series_id]
+        values = update if values is None else concat([values, update])
+        meta = {
+               'realtime_start': vintage,
+               'observation_end': values.index[-1].strftime('%Y-%m-%d') if len(values) else None
+               }
+        self.store.write(series_id,values,meta)
+        return values
+
+    def sync_many(self,series_ids):
+        """
+        Synchronize several series and return a dictionary of their values by series id.
+
+        :arg list series_ids: The ids for the series. Required.
+        """
+        return dict((series_id, self.sync(series_id)) for series_id in series_ids)
@@ -0,0 +1,93 @@
+from fred.utils import _atomic_write
+from array import array
+from json import dump, load
+
+class CategoryTree(object):
+    """
+    Snapshot of FRED's category hierarchy, as built by
+    :meth:`fred.clients.categories.CategoriesClient.walk`. Categories are
+    kept in flat arrays indexed by category id: the parent of each category,
+    and the children of all categories laid end to end with the offset of
+    each category's first child. Looking up a category, its parent or its
+    children is a local O(1) read.
+
+    :arg int root: Id of the category the tree was walked from.
+    :arg list categories: ``(id, parent_id, name)`` of every category, parents before children.
+    """
+    def __init__(self,root,categories):
+        self.root = root
+        size = max(category_id for category_id, _, _ in categories) + 1 if categories else 1
+        self.parent = array('l', [-1]) * size
+        self.names = [None] * size
+        counts = array('l', [0]) * (size + 1)
+        for category_id, parent_id, name in categories:
+            self.parent[category_id] = parent_id
+            self.names[category_id] = name
+            if category_id != root:
+                counts[parent_id + 1] += 1
+        ## Offsets of each category's children in child_ids
+        for i in range(size):
+            counts[i + 1] += counts[i]
+        self.child_start = counts
+        self.child_ids = array('l', [0]) * counts[size]
+        filled = array('l', counts)
+        for category_id, parent_id, _ in categories:
+            if category_id != root:
+                self.child_ids[filled[parent_id]] = category_id
+                filled[parent_id] += 1
+        self._order = [category_id for category_id, _, _ in categories]
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self,category_id):
+        return 0 <= category_id < len(self.names) and self.names[category_id] is not None
+
+    def details(self,category_id):
+        """
+        Return the id, name and parent_id of a category, as ``category.details`` does.
+        """
+        if category_id not in self:
+            raise KeyError(category_id)
+        return {'id': category_id,'name': self.names[category_id],'parent_id': self.parent[category_id]}
+
+    def children(self,category_id):
+        """
+        Return the ids of a category's children, in the order FRED lists them.
+        """
+        if category_id not in self:
+            raise KeyError(category_id)
+        return list(self.child_ids[self.child_start[category_id]:self.child_start[category_id + 1]])
+
+    def ancestors(self,category_id):
+        """
+        Return the ids of a category's parent, its parent's parent and so on up to the root.
+        """
+        if category_id not in self:
+            raise KeyError(category_id)
+        ancestors = []
+        while category_id != self.root:
+            category_id = self.parent[category_id]
+            ancestors.append(category_id)
+        return ancestors
+
+    def categories(self):
+        """
+        Return ``(id, parent_id, name)`` for every category, parents before children.
+        """
+        return [(category_id, self.parent[category_id], self.names[category_id]) for category_id in self._order]
+
+    def save(self,path):
+        """
+        Write the tree to a snapshot file, replacing it atomically.
+        """
+        _atomic_write(path,lambda f: dump({'root': self.root,'categories': self.categories()},f))
+
+    @classmethod
+    def load(cls,path):
+        """
+        Read a tree from a snapshot file written by ``save``.
+        """
+        with open(path) as f:
+            snapshot = load(f)
+        return cls(snapshot['root'],[tuple(category) for category in snapshot['categories']])
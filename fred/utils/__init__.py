@@ -1,5 +1,27 @@
 
 from functools import wraps
+import os
+import tempfile
+
+## Atomic rename over an existing file (os.replace is Python 3.3+)
+_replace = getattr(os, 'replace', os.rename)
+
+def _atomic_write(path,write,mode='w',prefix='tmp',suffix='.tmp'):
+    """
+    Helper funcation that replaces the file at path atomically: write is
+    called with a temporary file opened in mode in the same directory,
+    which is then renamed over path. Readers see the old file or the new
+    one, never a partial write.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),prefix=prefix,suffix=suffix)
+    try:
+        with os.fdopen(fd,mode) as f:
+            write(f)
+        _replace(tmp,path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
 
 def query_params(*frb_fred_params):
     """
@@ -28,3 +50,23 @@ class NamespacedClient(object):
         self.url_root = url_root
         self.response_type = response_type
         self.ssl_verify = ssl_verify
+
+    @property
+    def transport(self):
+        return self.client.transport
+
+    @property
+    def store(self):
+        return self.client.store
+
+    def _file_type(self,response_type):
+        """
+        Return the file_type to request for response_type: None (FRED's
+        default, xml) for xml, json for json and raw, and the client's
+        file_type for the structured response types.
+        """
+        if response_type == 'xml':
+            return None
+        if response_type in ('json','raw'):
+            return 'json'
+        return None if self.client.file_type == 'xml' else 'json'